@@ -1,22 +1,46 @@
+import base64
+import cProfile
+import csv
+import hashlib
+import io
 import json
 import logging
+import math
+import multiprocessing
+import pstats
+import queue
+import random
+import secrets
+import select
 import sys
 import re
+import tempfile
+import threading
+import time
+import zlib
 import psycopg2
+import psycopg2.extensions
+import psycopg2.errors
 import psycopg2.extras
-from flask import Flask, render_template, request, jsonify, g, redirect, url_for, flash
+import psycopg2.pool
+import click
+from flask import Blueprint, Flask, Response, current_app, has_request_context, render_template, request, jsonify, g, redirect, url_for, flash, session, stream_with_context
+from flask.cli import AppGroup
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
 from werkzeug.middleware.proxy_fix import ProxyFix
-from datetime import datetime, timedelta, date
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, date, time as dt_time, timezone
 import os
 from dotenv import load_dotenv
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
-# Load environment variables
+# Load environment variables (a local file read; settings below are read from the environment)
 load_dotenv()
 
 # --- App Configuration ---
@@ -32,9 +56,9 @@ if DATABASE_URL:
         'database': url.path[1:],  # Remove leading '/'
         'user': url.username,
         'password': url.password,
-        'sslmode': 'require'  # Required for most cloud databases
+        # Required for most cloud databases; local servers can pass ?sslmode=disable
+        'sslmode': parse_qs(url.query).get('sslmode', ['require'])[0]
     }
-    print(f"Using PostgreSQL database: {DATABASE_CONFIG['host']}")
 else:
     # Fallback for local development (you'll need local PostgreSQL)
     DATABASE_CONFIG = {
@@ -44,56 +68,31 @@ else:
         'user': 'postgres',
         'password': 'password'
     }
-    print("Warning: Using local PostgreSQL database for development")
-
-
-# Flask App Initialization
-app = Flask(__name__)
-
-# Production Configuration
-app.config['DATABASE_CONFIG'] = DATABASE_CONFIG
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_very_strong_random_secret_key_for_dev_only_123!')
-app.config['WTF_CSRF_ENABLED'] = os.environ.get('WTF_CSRF_ENABLED', 'True').lower() == 'true'
-app.config['WTF_CSRF_TIME_LIMIT'] = int(os.environ.get('WTF_CSRF_TIME_LIMIT', '3600'))
-
-# Session Security Configuration
-app.config['SESSION_COOKIE_SECURE'] = os.environ.get('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
-app.config['SESSION_COOKIE_HTTPONLY'] = os.environ.get('SESSION_COOKIE_HTTPONLY', 'True').lower() == 'true'
-app.config['SESSION_COOKIE_SAMESITE'] = os.environ.get('SESSION_COOKIE_SAMESITE', 'Lax')
-app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)  # 8 hour session timeout
-
-# Security Check - Fail if using default SECRET_KEY in production
-if app.config['SECRET_KEY'] == 'a_very_strong_random_secret_key_for_dev_only_123!':
-    if os.environ.get('FLASK_ENV') == 'production' or os.environ.get('ENVIRONMENT') == 'production':
-        app.logger.critical("CRITICAL SECURITY ERROR: Default SECRET_KEY detected in production environment!")
-        app.logger.critical("Application will not start. Please set a strong SECRET_KEY environment variable.")
-        print("CRITICAL SECURITY ERROR: Default SECRET_KEY detected in production!")
-        print("Set a strong SECRET_KEY environment variable before starting the application.")
-        sys.exit(1)
-    else:
-        print("WARNING: Using default SECRET_KEY. This is only safe in development!")
 
-# Production middleware for proxy handling (Render, Heroku, etc.)
-app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
+DEV_SECRET_KEY = 'a_very_strong_random_secret_key_for_dev_only_123!'
 
-# Initialize security extensions
-csrf = CSRFProtect(app)
+# Extensions are bound to the application in create_app()
+csrf = CSRFProtect()
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["1000 per day", "200 per hour"],  # Increased for better scalability (was 200/day, 50/hour)
     storage_uri=os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
 )
-limiter.init_app(app)
 
-# Production Logging Configuration
-if not app.debug:
+# Flask-Login setup
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
+
+# Routes, hooks and CLI commands; cli_group=None keeps commands at the top level (flask init-db)
+bp = Blueprint('main', __name__, cli_group=None)
+
+def configure_logging(app):
+    """Attach the file and console handlers; the log file is opened on the first record"""
     log_level = getattr(logging, os.environ.get('LOG_LEVEL', 'INFO').upper())
     
     # Create file handler for production logs
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-    
-    file_handler = logging.FileHandler('logs/focusflow.log')
+    os.makedirs('logs', exist_ok=True)
+    file_handler = logging.FileHandler('logs/focusflow.log', delay=True)
     file_handler.setFormatter(logging.Formatter(
         '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
     ))
@@ -106,22 +105,473 @@ if not app.debug:
     app.logger.addHandler(stream_handler)
     
     app.logger.setLevel(log_level)
-    app.logger.info('FocusFlow startup')
 
-
-# Flask-Login setup
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+def create_app(config=None):
+    """
+    Build the FocusFlow application.
+    Creating it does no network I/O: database connections, the event listener,
+    the timer reaper and the hashing pool all start on first use in each
+    process, so gunicorn can build the app once in the master (--preload) and
+    fork workers that share it copy-on-write.
+    """
+    app = Flask(__name__)
+    
+    # Production Configuration
+    app.config['DATABASE_CONFIG'] = DATABASE_CONFIG
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', DEV_SECRET_KEY)
+    app.config['WTF_CSRF_ENABLED'] = os.environ.get('WTF_CSRF_ENABLED', 'True').lower() == 'true'
+    app.config['WTF_CSRF_TIME_LIMIT'] = int(os.environ.get('WTF_CSRF_TIME_LIMIT', '3600'))
+    
+    # Session Security Configuration
+    app.config['SESSION_COOKIE_SECURE'] = os.environ.get('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
+    app.config['SESSION_COOKIE_HTTPONLY'] = os.environ.get('SESSION_COOKIE_HTTPONLY', 'True').lower() == 'true'
+    app.config['SESSION_COOKIE_SAMESITE'] = os.environ.get('SESSION_COOKIE_SAMESITE', 'Lax')
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)  # 8 hour session timeout
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    if config:
+        app.config.update(config)
+    
+    # Production Logging Configuration
+    if not app.debug:
+        configure_logging(app)
+    
+    # Security Check - Fail if using default SECRET_KEY in production
+    if app.config['SECRET_KEY'] == DEV_SECRET_KEY:
+        if os.environ.get('FLASK_ENV') == 'production' or os.environ.get('ENVIRONMENT') == 'production':
+            app.logger.critical("CRITICAL SECURITY ERROR: Default SECRET_KEY detected in production environment!")
+            app.logger.critical("Application will not start. Please set a strong SECRET_KEY environment variable.")
+            print("CRITICAL SECURITY ERROR: Default SECRET_KEY detected in production!")
+            print("Set a strong SECRET_KEY environment variable before starting the application.")
+            sys.exit(1)
+        else:
+            print("WARNING: Using default SECRET_KEY. This is only safe in development!")
+    
+    if DATABASE_URL:
+        print(f"Using PostgreSQL database: {DATABASE_CONFIG['host']}")
+    else:
+        print("Warning: Using local PostgreSQL database for development")
+    
+    # Production middleware for proxy handling (Render, Heroku, etc.)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
+    
+    # Initialize security extensions
+    csrf.init_app(app)
+    limiter.init_app(app)
+    login_manager.init_app(app)
+    
+    app.register_blueprint(bp)
+    app.teardown_appcontext(close_db)
+    
+    if not app.debug:
+        app.logger.info('FocusFlow startup')
+    return app
 
 # --- PostgreSQL Database Connection ---
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool.
+    Connections are validated on checkout, recycled once they exceed max_age
+    seconds and callers wait up to timeout seconds when the pool is exhausted.
+    """
+
+    def __init__(self, dsn_config, min_size=1, max_size=10, max_age=1800, max_idle=300, timeout=10, validate_after=30):
+        self.dsn_config = dsn_config
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.max_age = max_age
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._idle = []  # list of (connection, created_at, returned_at)
+        self._in_use = {}  # id(connection) -> created_at
+        self._lock = threading.Condition()
+        self._pid = os.getpid()
+        self._stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats():
+        return {
+            'connections_created': 0,
+            'connections_recycled': 0,
+            'connections_failed_validation': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.dsn_config)
+        conn.autocommit = False  # Use transactions
+        with self._lock:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _reset_after_fork(self):
+        # Connections must never be shared between processes (gunicorn forks workers)
+        if self._pid != os.getpid():
+            self._idle = []
+            self._in_use = {}
+            self._lock = threading.Condition()
+            self._stats = self._new_stats()
+            self._pid = os.getpid()
+
+    def _is_usable(self, conn, created_at, returned_at):
+        # Called without the lock held: the validation ping may be slow
+        now = time.monotonic()
+        if conn.closed:
+            return False
+        if self.max_age and now - created_at > self.max_age:
+            with self._lock:
+                self._stats['connections_recycled'] += 1
+            return False
+        if now - returned_at > self.validate_after:
+            try:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+                cursor.close()
+                conn.rollback()
+            except psycopg2.Error:
+                with self._lock:
+                    self._stats['connections_failed_validation'] += 1
+                return False
+        return True
+
+    def getconn(self):
+        self._reset_after_fork()
+        started = time.monotonic()
+        waited = False
+        while True:
+            with self._lock:
+                while True:
+                    if self._idle:
+                        # Take the connection and its slot; it is validated outside the lock
+                        conn, created_at, returned_at = self._idle.pop()
+                        self._in_use[id(conn)] = created_at
+                        break
+
+                    if len(self._in_use) < self.max_size:
+                        # Reserve the slot before connecting so concurrent callers respect max_size
+                        conn = None
+                        placeholder = object()
+                        self._in_use[id(placeholder)] = None
+                        break
+
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise psycopg2.pool.PoolError('Timed out waiting for a database connection')
+                    waited = True
+                    self._lock.wait(remaining)
+
+            if conn is None:
+                break
+            if self._is_usable(conn, created_at, returned_at):
+                with self._lock:
+                    return self._record_checkout(conn, started, waited)
+            self._discard(conn)
+            with self._lock:
+                del self._in_use[id(conn)]
+                self._lock.notify()
+
+        try:
+            conn = self._connect()
+        except psycopg2.Error:
+            with self._lock:
+                del self._in_use[id(placeholder)]
+                self._lock.notify()
+            raise
+
+        with self._lock:
+            del self._in_use[id(placeholder)]
+            self._in_use[id(conn)] = time.monotonic()
+            return self._record_checkout(conn, started, waited)
+
+    def _record_checkout(self, conn, started, waited):
+        self._stats['checkouts'] += 1
+        if waited:
+            wait_time = time.monotonic() - started
+            self._stats['waits'] += 1
+            self._stats['wait_time_total'] += wait_time
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], wait_time)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if self._pid != os.getpid():
+            return
+        if not conn.closed and not discard:
+            try:
+                # Never hand out a connection with an open transaction
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._lock:
+            created_at = self._in_use.pop(id(conn), None)
+            if created_at is None or conn.closed or discard:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._prune_idle()
+            self._lock.notify()
+
+    def _prune_idle(self):
+        # Close connections idle for longer than max_idle, keeping at least min_size open
+        now = time.monotonic()
+        while self._idle and len(self._idle) + len(self._in_use) > self.min_size:
+            conn, _, returned_at = self._idle[0]
+            if now - returned_at <= self.max_idle:
+                break
+            self._idle.pop(0)
+            self._discard(conn)
+
+    def closeall(self):
+        with self._lock:
+            for conn, _, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            })
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+
+db_pool = ConnectionPool(
+    DATABASE_CONFIG,
+    min_size=int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+    max_size=int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+    max_age=int(os.environ.get('DB_POOL_MAX_AGE', '1800')),
+    max_idle=int(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    validate_after=float(os.environ.get('DB_POOL_VALIDATE_AFTER', '30')),
+)
+
+# --- Metrics ---
+METRIC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_DEFINITIONS = {
+    'focusflow_db_query_duration_seconds': ('histogram', 'Time spent in execute_query, by statement'),
+    'focusflow_db_query_errors_total': ('counter', 'Statements that raised an error'),
+    'focusflow_db_slow_queries_total': ('counter', 'Statements slower than SLOW_QUERY_MS'),
+    'focusflow_http_request_duration_seconds': ('histogram', 'Request latency, by endpoint'),
+    'focusflow_http_requests_total': ('counter', 'Requests, by endpoint and status'),
+    'focusflow_http_request_queries_total': ('counter', 'Statements issued while serving each endpoint'),
+    'focusflow_http_request_query_seconds_total': ('counter', 'Database time while serving each endpoint'),
+}
+STATEMENT_VERB_PATTERN = re.compile(r'^\s*(\w+)')
+STATEMENT_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([a-z_]+)', re.IGNORECASE)
+
+class Metrics:
+    """
+    Counters and histograms kept per worker process.
+    With a directory configured, each worker writes a snapshot to its own
+    worker_<pid>_<token>.json file (at most every flush_interval seconds) and
+    the /metrics endpoint sums the snapshots of every worker. The random token
+    keeps a replacement worker that reuses a pid from overwriting the file of
+    the worker that exited. Exited workers' files are kept, so totals do not go
+    backwards while the server runs; gunicorn.conf.py clears the directory on
+    startup, so it holds one file per worker started since then.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One snapshot writer at a time
+        self._pid = os.getpid()
+        self._filename = self._worker_filename()
+        self._last_flush = 0.0
+
+    @staticmethod
+    def _worker_filename():
+        return f'worker_{os.getpid()}_{secrets.token_hex(6)}.json'
+
+    def _reset_after_fork(self):
+        # Values recorded in the master belong to the master, not to each worker
+        if self._pid != os.getpid():
+            self._counters = {}
+            self._histograms = {}
+            self._flush_lock = threading.Lock()
+            self._pid = os.getpid()
+            self._filename = self._worker_filename()
+            self._last_flush = 0.0
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._reset_after_fork()
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            self._reset_after_fork()
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = [0] * (len(METRIC_BUCKETS) + 2)
+            for i, bound in enumerate(METRIC_BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._reset_after_fork()
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), values] for (name, labels), values in self._histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write this worker's snapshot; skipped when written within flush_interval"""
+        if not self.directory:
+            return
+        with self._lock:
+            self._reset_after_fork()
+            flush_lock = self._flush_lock
+            filename = self._filename
+        # Request threads skip a flush another thread is already writing
+        if not flush_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self._last_flush < self.flush_interval:
+                return
+            self._last_flush = now
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, filename)
+            # A private temporary file, renamed into place once complete
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.worker_', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        finally:
+            flush_lock.release()
+
+    def collect(self):
+        """Merge the snapshots of every worker (or just this one without a directory)"""
+        if self.directory:
+            self.flush(force=True)
+            snapshots = []
+            for filename in os.listdir(self.directory):
+                if filename.startswith('worker_') and filename.endswith('.json'):
+                    try:
+                        with open(os.path.join(self.directory, filename)) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue
+        else:
+            snapshots = [self.snapshot()]
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+        return counters, histograms
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (metric_type, help_text) in METRIC_DEFINITIONS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            if metric_type == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{format_metric_labels(labels)} {value}')
+                continue
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(METRIC_BUCKETS, values):
+                    lines.append(f'{name}_bucket{format_metric_labels(labels + (("le", repr(bound)),))} {count}')
+                lines.append(f'{name}_bucket{format_metric_labels(labels + (("le", "+Inf"),))} {values[-1]}')
+                lines.append(f'{name}_sum{format_metric_labels(labels)} {values[-2]}')
+                lines.append(f'{name}_count{format_metric_labels(labels)} {values[-1]}')
+        return '\n'.join(lines) + '\n'
+
+def format_metric_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+metrics = Metrics(
+    directory=os.environ.get('METRICS_DIR') or None,
+    flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', '5')),
+)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '500'))
+
+_statement_names = {}
+
+def statement_name(query, caller):
+    """Low-cardinality label for a query: calling function, verb and first table"""
+    name = _statement_names.get((caller, query))
+    if name is None:
+        verb = STATEMENT_VERB_PATTERN.match(query)
+        table = STATEMENT_TABLE_PATTERN.search(query)
+        name = ':'.join(part for part in (
+            caller,
+            verb.group(1).lower() if verb else None,
+            table.group(1).lower() if table else None,
+        ) if part)
+        if len(_statement_names) < 10000:
+            _statement_names[(caller, query)] = name
+    return name
+
+def record_query(query, caller, duration, failed):
+    name = statement_name(query, caller)
+    labels = (('statement', name),)
+    metrics.observe('focusflow_db_query_duration_seconds', labels, duration)
+    if failed:
+        metrics.inc('focusflow_db_query_errors_total', labels)
+    if 'query_count' in g:
+        g.query_count += 1
+        g.query_seconds += duration
+    if SLOW_QUERY_MS > 0 and duration * 1000 >= SLOW_QUERY_MS:
+        metrics.inc('focusflow_db_slow_queries_total', labels)
+        endpoint = request.endpoint if has_request_context() else 'cli'
+        current_app.logger.warning(
+            f"Slow query {name} took {duration * 1000:.0f} ms [{endpoint}]: {' '.join(query.split())[:300]}"
+        )
 
 # --- Security Helper Functions ---
 def handle_database_error(e, operation, user_message="An error occurred. Please try again."):
     """Safely handle database errors without exposing sensitive information"""
     error_id = f"err_{int(datetime.now().timestamp())}"
     # Security: Never log sensitive data or full error details
-    app.logger.error(f"Database error [{error_id}] during {operation}: {type(e).__name__}")
+    current_app.logger.error(f"Database error [{error_id}] during {operation}: {type(e).__name__}")
     return user_message, error_id
 
 def safe_error_response(message="An error occurred. Please try again.", status_code=500):
@@ -165,6 +615,13 @@ def validate_password(password):
     
     return True, ""
 
+PG_INT_MAX = 2 ** 31 - 1  # task ids are INTEGER columns
+
+def is_valid_task_id(task_id):
+    """True for a positive integer, or string of ASCII digits, that fits an INTEGER column"""
+    task_id = str(task_id)
+    return task_id.isascii() and task_id.isdigit() and 0 < int(task_id) <= PG_INT_MAX
+
 def validate_timer_request(data, required_fields):
     """Validate timer API requests for security"""
     if not data:
@@ -179,9 +636,9 @@ def validate_timer_request(data, required_fields):
     if session_id and not re.match(r'^session_\d+_[a-z0-9]+$', session_id):
         return False, "Invalid session ID format"
     
-    # Validate task_id is integer
+    # Validate task_id is an integer in range (larger values overflow the INTEGER casts)
     task_id = data.get('task_id')
-    if task_id and not isinstance(task_id, int) and not str(task_id).isdigit():
+    if task_id and not is_valid_task_id(task_id):
         return False, "Invalid task ID format"
     
     return True, ""
@@ -206,20 +663,23 @@ def serialize_task_data(task_dict):
     return task_dict
 
 # --- Database Helper Functions ---
-def execute_query(query, params=None, fetch_one=False, fetch_all=False):
-    """Helper function to execute PostgreSQL queries"""
+def execute_query(query, params=None, fetch_one=False, fetch_all=False, commit=False):
+    """
+    Helper function to execute PostgreSQL queries.
+    Pass commit=True with fetch_one/fetch_all for writes that use RETURNING.
+    """
     db = get_db()
     cursor = db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    started = time.perf_counter()
+    failed = False
     
     try:
         cursor.execute(query, params)
         
-        if fetch_one:
-            result = cursor.fetchone()
-            cursor.close()
-            return result
-        elif fetch_all:
-            result = cursor.fetchall()
+        if fetch_one or fetch_all:
+            result = cursor.fetchone() if fetch_one else cursor.fetchall()
+            if commit:
+                db.commit()
             cursor.close()
             return result
         else:
@@ -229,92 +689,298 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False):
             return cursor.rowcount
             
     except Exception as e:
+        failed = True
         db.rollback()
         cursor.close()
         raise e
+    finally:
+        record_query(query, sys._getframe(1).f_code.co_name, time.perf_counter() - started, failed)
 
 def get_db():
     if 'db' not in g:
         try:
-            g.db = psycopg2.connect(**app.config['DATABASE_CONFIG'])
-            g.db.autocommit = False  # Use transactions
+            g.db = db_pool.getconn()
         except psycopg2.Error as e:
             print(f"Error connecting to PostgreSQL database: {e}")
             raise
     return g.db
 
-@app.teardown_appcontext
 def close_db(exception):
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        # Return the connection to the pool; broken connections are discarded
+        db_pool.putconn(db, discard=db.closed != 0)
+
+# --- Schema Migrations ---
+# Versioned SQL files (NNNN_name.sql), applied in order by `flask db upgrade`.
+# A file starting with "-- migrate: no-transaction" runs statement by statement
+# outside a transaction, which CREATE INDEX CONCURRENTLY requires.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+# Advisory lock key shared by every process that runs migrations
+MIGRATION_LOCK_ID = 4_471_602
+CONCURRENT_INDEX_PATTERN = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.IGNORECASE
+)
 
-def init_db():
-    # Initialize PostgreSQL database with schema
+def load_migrations():
+    """Return (version, name, sql, checksum) for each migration file, in version order"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding='utf-8') as f:
+            sql = f.read()
+        migrations.append((int(match.group(1)), match.group(2), sql,
+                           hashlib.sha256(sql.encode('utf-8')).hexdigest()))
+    return migrations
+
+def split_sql_statements(sql):
+    """Split a no-transaction migration on semicolons; its statements must not contain any"""
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+def apply_migration(conn, version, name, sql, checksum):
+    started = time.monotonic()
+    cursor = conn.cursor()
+    record = ("INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)")
     try:
-        with app.app_context():
-            db = get_db()
-            cursor = db.cursor()
-            
-            # Read and execute PostgreSQL schema
-            with app.open_resource('schema_postgresql.sql', mode='r') as f:
-                schema_sql = f.read()
-                
-            # Execute the schema (PostgreSQL handles multiple statements)
-            cursor.execute(schema_sql)
-            db.commit()
-            cursor.close()
-            
-        print(f"PostgreSQL database initialized successfully at {app.config['DATABASE_CONFIG']['host']}")
-    except Exception as e:
-        print(f"Error during PostgreSQL database initialization: {e}")
-        print(f"Database config: {app.config.get('DATABASE_CONFIG', 'Not Set')}")
+        if sql.startswith(NO_TRANSACTION_MARKER):
+            for statement in split_sql_statements(sql):
+                index = CONCURRENT_INDEX_PATTERN.search(statement)
+                if index:
+                    # An interrupted concurrent build leaves an INVALID index behind,
+                    # which IF NOT EXISTS would keep; drop it and build again
+                    cursor.execute("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)",
+                                   (index.group(1),))
+                    invalid = cursor.fetchone()
+                    if invalid and invalid[0]:
+                        cursor.execute(f"DROP INDEX CONCURRENTLY {index.group(1)}")
+                cursor.execute(statement)
+            cursor.execute(record, (version, name, checksum, int((time.monotonic() - started) * 1000)))
+        else:
+            conn.autocommit = False
+            cursor.execute(sql)
+            cursor.execute(record, (version, name, checksum, int((time.monotonic() - started) * 1000)))
+            conn.commit()
+    except psycopg2.Error:
+        if not conn.autocommit:
+            conn.rollback()
         raise
+    finally:
+        conn.autocommit = True
+        cursor.close()
 
+def migrate_db(target=None, log=print):
+    """
+    Apply pending migrations up to target (default: all) and return how many ran.
+    A session advisory lock makes concurrent runs wait for each other.
+    """
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    applied_count = 0
+    try:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    checksum VARCHAR(64) NOT NULL,
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    duration_ms INTEGER
+                )
+            """)
+            cursor.execute("SELECT version, checksum FROM schema_migrations")
+            applied = dict(cursor.fetchall())
+            for version, name, sql, checksum in load_migrations():
+                if target is not None and version > target:
+                    break
+                if version in applied:
+                    if applied[version] != checksum:
+                        log(f"Warning: migration {version:04d}_{name} has changed since it was applied")
+                    continue
+                log(f"Applying {version:04d}_{name}...")
+                apply_migration(conn, version, name, sql, checksum)
+                applied_count += 1
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+    finally:
+        cursor.close()
+        conn.close()
+    return applied_count
+
+def migration_status():
+    """Return (version, name, state, applied_at) for every known migration"""
+    applied = {}
+    if execute_query("SELECT to_regclass('schema_migrations') IS NOT NULL AS present", fetch_one=True)['present']:
+        rows = execute_query("SELECT version, checksum, applied_at FROM schema_migrations", fetch_all=True)
+        applied = {row['version']: row for row in rows}
+    status = []
+    for version, name, _, checksum in load_migrations():
+        row = applied.get(version)
+        if row is None:
+            status.append((version, name, 'pending', None))
+        else:
+            state = 'applied' if row['checksum'] == checksum else 'modified'
+            status.append((version, name, state, row['applied_at']))
+    return status
 
-@app.cli.command('init-db')
-def init_db_command():
+def init_db():
+    """Drop every table in the schema and rebuild it from the migrations (development only)"""
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    conn.autocommit = True
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = current_schema()")
+        for (table,) in cursor.fetchall():
+            cursor.execute(f'DROP TABLE IF EXISTS "{table}" CASCADE')
+        cursor.close()
+    finally:
+        conn.close()
+    migrate_db()
+    print(f"PostgreSQL database initialized successfully at {DATABASE_CONFIG['host']}")
+
+db_cli = AppGroup('db', help='Manage the PostgreSQL schema.')
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Stop after this migration version')
+def db_upgrade_command(target):
+    """Apply pending migrations from migrations/"""
+    applied = migrate_db(target)
+    print(f"Applied {applied} migration(s)." if applied else "Database schema is up to date.")
+
+@db_cli.command('status')
+def db_status_command():
+    """List migrations and whether they have been applied"""
+    status = migration_status()
+    for version, name, state, applied_at in status:
+        print(f"{version:04d}_{name:<32} {state:<9} {applied_at or ''}")
+    if any(state != 'applied' for _, _, state, _ in status):
+        sys.exit(1)
+
+bp.cli.add_command(db_cli)
+
+@bp.cli.command('init-db')
+@click.option('--yes', is_flag=True, help='Do not ask for confirmation')
+def init_db_command(yes):
+    """Drop all tables and recreate the schema"""
+    if not yes:
+        click.confirm('This drops every table and all data. Continue?', abort=True)
     init_db()
     # No print needed here as init_db() already prints
 
-# Auto-initialize database on startup (for production deployments)
-def ensure_database_initialized():
-    """Ensure PostgreSQL database schema is initialized on app startup"""
-    try:
-        with app.app_context():
-            db = get_db()
-            cursor = db.cursor()
-            
-            # Check if users table exists
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT 1 FROM information_schema.tables 
-                    WHERE table_name = 'users'
-                );
-            """)
-            tables_exist = cursor.fetchone()[0]
-            cursor.close()
-            
-            if not tables_exist:
-                print("PostgreSQL database schema not found. Auto-initializing...")
-                init_db()
-                print("Database auto-initialization completed successfully.")
-            else:
-                print("PostgreSQL database schema already exists.")
-                
-    except Exception as e:
-        print(f"Error during database initialization check: {e}")
-        # Try to initialize anyway
+# --- Password Hashing ---
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already queued in this worker"""
+
+
+class PasswordHasher:
+    """
+    Runs PBKDF2 hashing and verification in a small process pool so CPU-bound
+    logins do not stall the worker's other threads (timer syncs, SSE streams).
+    At most max_pending hashes are queued per worker; beyond that callers get
+    PasswordHasherBusy instead of waiting.
+    """
+
+    def __init__(self, method, workers=2, max_pending=8, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._dummy_hash = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # Pools do not survive fork; each worker starts its own. Forking
+                # this multithreaded process could copy locks held by other
+                # threads, so children come from a single-threaded fork server
+                # (spawn where unavailable) that only loads werkzeug's hashing.
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    context.set_forkserver_preload(['werkzeug.security'])
+                else:
+                    context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
         try:
-            with app.app_context():
-                init_db()
-            print("Database auto-initialization completed successfully.")
-        except Exception as init_error:
-            print(f"Error during database auto-initialization: {init_error}")
-            app.logger.error(f"Database initialization failed: {init_error}")
+            return self._get_executor().submit(func, *args).result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise PasswordHasherBusy()
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def verify_unknown_user(self, password):
+        """Spend the same time as a real check so unknown usernames are not revealed by timing"""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash(secrets.token_hex(16))
+        self.verify(self._dummy_hash, password)
+        return False
+
+    def needs_rehash(self, password_hash):
+        # Werkzeug hashes look like "pbkdf2:sha256:600000$salt$hash"
+        return password_hash.split('$', 1)[0] != self.method
 
-# Initialize database on import (when gunicorn starts the app)
-ensure_database_initialized()
+
+password_hasher = PasswordHasher(
+    # Work factor for new hashes; older hashes are upgraded on the next successful login
+    method=f"pbkdf2:sha256:{int(os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_PBKDF2_ITERATIONS))}",
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '2')),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '8')),
+)
+
+
+class LoginThrottle:
+    """
+    Replaces the blocking sleep after a failed login: further attempts for the
+    same username from the same client IP are refused without hashing until the
+    delay has passed. Keying on the IP too means failures sent by someone else
+    cannot lock a user out.
+    """
+
+    def __init__(self, delay=0.5, max_entries=10000):
+        self.delay = delay
+        self.max_entries = max_entries
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+
+    def is_blocked(self, username, client_ip):
+        with self._lock:
+            return self._blocked_until.get((username, client_ip), 0) > time.monotonic()
+
+    def record_failure(self, username, client_ip):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._blocked_until) >= self.max_entries:
+                self._blocked_until = {key: until for key, until in self._blocked_until.items() if until > now}
+            self._blocked_until[(username, client_ip)] = now + self.delay
+
+
+login_throttle = LoginThrottle(delay=float(os.environ.get('LOGIN_FAILURE_DELAY', '0.5')))
 
 # --- User Model for Flask-Login ---
 class User(UserMixin):
@@ -325,33 +991,131 @@ class User(UserMixin):
         self.created_at = created_at # Store it
         # NOTE: password_hash deliberately excluded for security
 
+class UserCache:
+    """
+    Per-worker cache of the immutable user fields loaded on every authenticated
+    request. Entries expire after ttl seconds; the least recently used entry is
+    evicted once max_size users are cached.
+    """
+
+    def __init__(self, ttl=60, max_size=1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # user_id -> (expires_at, fields)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.session_hits = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, fields):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, fields)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def record_session_hit(self):
+        # Users served from the signed session cookie, without a cache lookup
+        with self._lock:
+            self.session_hits += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'session_hits': self.session_hits,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+user_cache = UserCache(
+    ttl=int(os.environ.get('USER_CACHE_TTL', '60')),
+    max_size=int(os.environ.get('USER_CACHE_SIZE', '1024')),
+)
+# Keep the user's fields in the signed session cookie so most requests skip the
+# lookup entirely. Off by default: a deleted user's session stays valid until it expires.
+USER_FIELDS_IN_SESSION = os.environ.get('USER_FIELDS_IN_SESSION', 'False').lower() == 'true'
+
+def user_fields_from_row(user_data):
+    """The immutable fields User is built from, as a JSON-safe dict"""
+    created_at_val = user_data['created_at']
+    if isinstance(created_at_val, datetime):
+        created_at_val = created_at_val.isoformat()
+    return {
+        'id': user_data['id'],
+        'username': user_data['username'],
+        'email': user_data['email'],
+        'created_at': created_at_val,
+    }
+
+def user_from_fields(fields):
+    # Convert created_at if it's a string, otherwise use as is if already datetime
+    created_at_val = fields['created_at']
+    if isinstance(created_at_val, str):
+        try:
+            created_at_val = datetime.fromisoformat(created_at_val)
+        except ValueError:
+            created_at_val = None
+    return User(fields['id'], fields['username'], fields['email'], created_at_val)
+
 @login_manager.user_loader
 def load_user(user_id):
-    # Security: Only load necessary user data, exclude password_hash
-    user_data = execute_query('SELECT id, username, email, created_at FROM users WHERE id = %s', (user_id,), fetch_one=True)
-    if user_data:
-        # Convert created_at if it's a string from the DB, otherwise use as is if already datetime
-        created_at_val = user_data['created_at']
-        if isinstance(created_at_val, str):
-             try:
-                created_at_val = datetime.fromisoformat(created_at_val)
-             except ValueError: # Fallback if not ISO format, though schema.sql uses DATETIME DEFAULT CURRENT_TIMESTAMP
-                created_at_val = None # Or handle error appropriately
-        return User(user_data['id'], user_data['username'], user_data['email'], created_at_val)
-    return None
+    if USER_FIELDS_IN_SESSION:
+        fields = session.get('user_fields')
+        if fields and str(fields.get('id')) == str(user_id):
+            user_cache.record_session_hit()
+            return user_from_fields(fields)
+    
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    
+    fields = user_cache.get(user_id)
+    if fields is None:
+        # Security: Only load necessary user data, exclude password_hash
+        user_data = execute_query('SELECT id, username, email, created_at FROM users WHERE id = %s', (user_id,), fetch_one=True)
+        if not user_data:
+            return None
+        fields = user_fields_from_row(user_data)
+        user_cache.put(user_id, fields)
+    return user_from_fields(fields)
 
 # --- Routes (Home, Auth) ---
-@app.route('/')
+@bp.route('/')
 def home():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     return render_template('home.html')
 
-@app.route('/signup', methods=['GET', 'POST'])
+@bp.route('/signup', methods=['GET', 'POST'])
 @limiter.limit("10 per hour", methods=['POST'])
 def signup():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     if request.method == 'POST':
         username = request.form.get('username')
         email = request.form.get('email')
@@ -370,12 +1134,14 @@ def signup():
             if not is_valid:
                 flash(password_error, 'error')
             else:
-                password_hash = generate_password_hash(password, method='pbkdf2:sha256')
                 try:
+                    password_hash = password_hasher.hash(password)
                     execute_query('INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)',
                                (username, email, password_hash))
                     flash('Account created successfully! Please log in.', 'success')
-                    return redirect(url_for('login'))
+                    return redirect(url_for('main.login'))
+                except PasswordHasherBusy:
+                    flash('The server is busy. Please try again in a moment.', 'error')
                 except psycopg2.Error as e:
                     user_message, error_id = handle_database_error(e, "user signup")
                     flash(user_message, 'error')
@@ -383,63 +1149,84 @@ def signup():
 
     return render_template('signup.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 @limiter.limit("20 per hour", methods=['POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         remember = True if request.form.get('remember') else False
 
+        # Security: Refuse retries right after a failure instead of sleeping in the worker
+        if login_throttle.is_blocked(username, request.remote_addr):
+            flash('Invalid username or password.', 'error')
+            return redirect(url_for('main.login'))
+
         # Security: Only get password_hash for verification, don't store it
         user_data = execute_query('SELECT id, username, email, password_hash, created_at FROM users WHERE username = %s', (username,), fetch_one=True)
 
-        if not user_data or not check_password_hash(user_data['password_hash'], password):
-            # Security: Add delay to prevent timing attacks
-            import time
-            time.sleep(0.5)
+        try:
+            if user_data:
+                password_valid = password_hasher.verify(user_data['password_hash'], password)
+            else:
+                password_valid = password_hasher.verify_unknown_user(password)
+        except PasswordHasherBusy:
+            flash('The server is busy. Please try again in a moment.', 'error')
+            return redirect(url_for('main.login'))
+
+        if not password_valid:
+            login_throttle.record_failure(username, request.remote_addr)
             flash('Invalid username or password.', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
+        
+        # Upgrade hashes made with an older work factor while we have the password
+        if password_hasher.needs_rehash(user_data['password_hash']):
+            try:
+                execute_query('UPDATE users SET password_hash = %s WHERE id = %s',
+                              (password_hasher.hash(password), user_data['id']))
+            except (PasswordHasherBusy, psycopg2.Error) as e:
+                current_app.logger.warning(f"Password rehash skipped for user ID {user_data['id']}: {type(e).__name__}")
         
         # Security: Regenerate session to prevent session fixation
         from flask import session
         session.regenerate = True
         
-        created_at_val = user_data['created_at']
-        if isinstance(created_at_val, str):
-            created_at_val = datetime.fromisoformat(created_at_val)
-
         # Security: Create user object without password_hash
-        user_obj = User(user_data['id'], user_data['username'], user_data['email'], created_at_val)
+        fields = user_fields_from_row(user_data)
+        user_obj = user_from_fields(fields)
         login_user(user_obj, remember=remember)
+        if USER_FIELDS_IN_SESSION:
+            session['user_fields'] = fields
+        user_cache.put(user_data['id'], fields)
         
         # Security: Log successful login
-        app.logger.info(f"Successful login for user: {username} (ID: {user_data['id']})")
+        current_app.logger.info(f"Successful login for user: {username} (ID: {user_data['id']})")
         
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     return render_template('login.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
+    session.pop('user_fields', None)
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     # You could pass username or other details if needed by the template directly
     return render_template('dashboard.html', username=current_user.username)
 
-@app.route('/achievements')
+@bp.route('/achievements')
 @login_required
 def achievements():
     return render_template('achievements.html', username=current_user.username)
 
-@app.route('/profile', methods=['GET', 'POST'])
+@bp.route('/profile', methods=['GET', 'POST'])
 @login_required
 def profile():
     if request.method == 'POST':
@@ -447,7 +1234,14 @@ def profile():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
 
-        if not check_password_hash(current_user.password_hash, current_password):
+        user_data = execute_query('SELECT password_hash FROM users WHERE id = %s', (current_user.id,), fetch_one=True)
+        try:
+            password_valid = bool(user_data) and password_hasher.verify(user_data['password_hash'], current_password)
+        except PasswordHasherBusy:
+            flash('The server is busy. Please try again in a moment.', 'error')
+            return redirect(url_for('main.profile'))
+
+        if not password_valid:
             flash('Current password incorrect.', 'error')
         elif new_password != confirm_password:
             flash('New passwords do not match.', 'error')
@@ -457,135 +1251,265 @@ def profile():
             if not is_valid:
                 flash(password_error, 'error')
             else:
-                new_password_hash = generate_password_hash(new_password, method='pbkdf2:sha256')
                 try:
+                    new_password_hash = password_hasher.hash(new_password)
                     execute_query('UPDATE users SET password_hash = %s WHERE id = %s', (new_password_hash, current_user.id))
                     
                     # Log the password change for security audit
-                    app.logger.info(f"Password changed for user ID: {current_user.id}, username: {current_user.username}")
+                    current_app.logger.info(f"Password changed for user ID: {current_user.id}, username: {current_user.username}")
                     
                     # Force re-authentication for security
+                    user_cache.invalidate(current_user.id)
+                    session.pop('user_fields', None)
                     logout_user()
                     flash('Password updated successfully. Please log in with your new password.', 'success')
-                    return redirect(url_for('login'))
+                    return redirect(url_for('main.login'))
+                except PasswordHasherBusy:
+                    flash('The server is busy. Please try again in a moment.', 'error')
                 except psycopg2.Error as e:
                     user_message, error_id = handle_database_error(e, "password update")
                     flash(user_message, 'error')
-        return redirect(url_for('profile'))
+        return redirect(url_for('main.profile'))
         
     return render_template('profile.html', user=current_user) # Pass the full user object
 
+# --- Conditional GET (ETag) Helpers ---
+# Bump when the JSON shape of a cached endpoint changes so old ETags stop matching
+RESPONSE_FORMAT_VERSION = 1
+
+def get_data_versions(user_id, scopes):
+    """Fetch the version stamps ('tasks' or a YYYY-MM-DD date) that back response ETags"""
+    rows = execute_query(
+        "SELECT scope, version FROM user_data_versions WHERE user_id = %s AND scope = ANY(%s)",
+        (user_id, list(scopes)), fetch_all=True
+    )
+    versions = {row['scope']: row['version'] for row in rows} if rows else {}
+    return [versions.get(scope, 0) for scope in scopes]
+
+def compute_etag(*parts):
+    """Build a strong ETag from the endpoint name, user and version stamps"""
+    raw = ':'.join(str(part) for part in (RESPONSE_FORMAT_VERSION,) + parts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+def not_modified_response(etag):
+    """Return a 304 response when the client already holds the current representation"""
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        return with_etag(response, etag)
+    return None
+
+def with_etag(response, etag):
+    # no-cache: browsers keep the body but revalidate with If-None-Match on every poll
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def parse_date_param(default=None):
+    """Read ?date= as a normalized YYYY-MM-DD string, or None when it is invalid"""
+    date_str = request.args.get('date') or default or datetime.now().strftime('%Y-%m-%d')
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+# --- Keyset Pagination Helpers ---
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
+
+def encode_page_cursor(timestamp, row_id):
+    """Opaque cursor for the row a page ended on, ordered by (timestamp, id)"""
+    if hasattr(timestamp, 'isoformat'):
+        timestamp = timestamp.isoformat()
+    raw = f"{timestamp}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_page_cursor(token):
+    """Return (timestamp, id) from a page cursor, or None when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+        timestamp, row_id = raw.split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:  # Also covers bad base64 and UTF-8
+        return None
+
+def parse_page_params():
+    """Read ?limit= and ?cursor=; returns (limit, cursor or None, error message or None)"""
+    try:
+        limit = int(request.args.get('limit', PAGE_SIZE_DEFAULT))
+    except ValueError:
+        return None, None, "limit must be a number"
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    token = request.args.get('cursor')
+    if not token:
+        return limit, None, None
+    cursor = decode_page_cursor(token)
+    if cursor is None:
+        return None, None, "Invalid cursor"
+    return limit, cursor, None
+
+def keyset_page(rows, limit, timestamp_key):
+    """Split a LIMIT limit + 1 result into (page, next cursor or None)"""
+    rows = list(rows or [])
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_page_cursor(last[timestamp_key], last['id'])
+
 # --- API Endpoints (User Specific) ---
-@app.route('/api/csrf-token', methods=['GET'])
+@bp.route('/api/csrf-token', methods=['GET'])
 @login_required
 def get_csrf_token():
     """Provide CSRF token for JavaScript API calls"""
     from flask_wtf.csrf import generate_csrf
     return jsonify({'csrf_token': generate_csrf()})
 
-@app.route('/api/daily-summary', methods=['GET'])
+@bp.route('/api/daily-summary', methods=['GET'])
 @login_required
 @limiter.limit("60 per minute")  # Allow frequent data refresh but prevent abuse
 def get_daily_summary():
-    date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    
-    tasks_raw = execute_query(
-        """SELECT id, title, description, start_time, duration_minutes, status, time_spent,
-                  timer_start_time, timer_session_id, last_sync_time
-           FROM user_tasks 
-           WHERE user_id = %s AND entry_date = %s 
-           ORDER BY CASE WHEN start_time IS NULL THEN 1 ELSE 0 END, start_time, created_at""", 
-        (current_user.id, date_str), fetch_all=True
+    date_str = parse_date_param()
+    if not date_str:
+        return jsonify({"error": "Invalid date format, expected YYYY-MM-DD"}), 400
+    
+    # The streak depends on every day's tasks, so the 'tasks' stamp is part of the ETag
+    etag = compute_etag('daily-summary', current_user.id, date_str, *get_data_versions(current_user.id, [date_str, 'tasks']))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
+    # Assemble the whole payload in a single round trip. The streak is the
+    # run of completed days (maintained by the streak engine) that ends on the
+    # viewed date or the day before it. Heartbeats bump no version stamp, so
+    # the timer's last_sync_time is left out of this cached payload.
+    summary = execute_query(
+        """SELECT
+               (SELECT COALESCE(json_agg(json_build_object(
+                           'id', t.id, 'title', t.title, 'description', t.description,
+                           'start_time', t.start_time, 'duration_minutes', t.duration_minutes,
+                           'status', t.status, 'time_spent', t.time_spent,
+                           'timer_start_time', a.started_at, 'timer_session_id', a.session_id)
+                       ORDER BY t.start_time IS NULL, t.start_time, t.created_at), '[]'::json)
+                FROM user_tasks t
+                LEFT JOIN active_timers a ON a.user_id = t.user_id AND a.task_id = t.id
+                WHERE t.user_id = %(user_id)s AND t.entry_date = %(date)s) AS tasks,
+               (SELECT notes FROM daily_entries
+                WHERE user_id = %(user_id)s AND entry_date = %(date)s) AS notes,
+               (SELECT COALESCE(json_agg(json_build_object(
+                           'id', a.id, 'message', a.message, 'timestamp', a.timestamp, 'task_db_id', a.task_db_id)
+                       ORDER BY a.timestamp DESC, a.id DESC), '[]'::json)
+                FROM (SELECT id, message, timestamp, task_db_id FROM activity_log
+                      WHERE user_id = %(user_id)s
+                        AND timestamp >= %(date)s::date AND timestamp < %(date)s::date + 1
+                      ORDER BY timestamp DESC, id DESC
+                      LIMIT %(activity_limit)s) a) AS activity_log,
+               (SELECT LEAST(r.end_date, %(date)s::date) - r.start_date + 1
+                FROM user_streak_runs r
+                WHERE r.user_id = %(user_id)s AND r.start_date <= %(date)s::date
+                  AND r.end_date >= %(date)s::date - 1
+                ORDER BY r.start_date DESC LIMIT 1) AS streak""",
+        {'user_id': current_user.id, 'date': date_str, 'activity_limit': PAGE_SIZE_DEFAULT + 1}, fetch_one=True
     )
-    
-    # Convert time objects to strings for JSON serialization
-    tasks = []
-    if tasks_raw:
-        for row in tasks_raw:
-            task = dict(row)
-            # Convert time objects to strings
-            if task.get('start_time'):
-                task['start_time'] = str(task['start_time'])
-            if task.get('timer_start_time'):
-                task['timer_start_time'] = task['timer_start_time'].isoformat() if hasattr(task['timer_start_time'], 'isoformat') else str(task['timer_start_time'])
-            if task.get('last_sync_time'):
-                task['last_sync_time'] = task['last_sync_time'].isoformat() if hasattr(task['last_sync_time'], 'isoformat') else str(task['last_sync_time'])
-            tasks.append(task)
-
-    daily_entry = execute_query('SELECT notes FROM daily_entries WHERE user_id = %s AND entry_date = %s', (current_user.id, date_str), fetch_one=True)
-    notes = daily_entry['notes'] if daily_entry else ''
-
-    activity_log_data_raw = execute_query(
-        "SELECT message, timestamp, task_db_id FROM activity_log WHERE user_id = %s AND DATE(timestamp) = DATE(%s) ORDER BY timestamp DESC", 
-        (current_user.id, date_str), fetch_all=True
-    )
-    activity_log_data = [{'message': row['message'], 'timestamp': row['timestamp'].isoformat(), 'task_db_id': row['task_db_id']} for row in activity_log_data_raw] if activity_log_data_raw else []
-    
-    completed_dates_raw = execute_query(
-        """SELECT DISTINCT entry_date FROM user_tasks 
-           WHERE user_id = %s AND status = 'completed' 
-           ORDER BY entry_date DESC""", (current_user.id,), fetch_all=True
-    )
-    completed_dates_str = [row['entry_date'] for row in completed_dates_raw] if completed_dates_raw else []
-    
-    current_streak = 0
-    if completed_dates_str:
-        today_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-        
-        last_streak_date = None
-        # Iterate through unique completed dates, from most recent
-        unique_sorted_completed_dates = sorted(list(set(d if isinstance(d, date) else datetime.strptime(d, '%Y-%m-%d').date() for d in completed_dates_str)), reverse=True)
+    # Only the newest page of the day's activity; older entries via /api/activity-log
+    activity_log, activity_next_cursor = keyset_page(summary['activity_log'], PAGE_SIZE_DEFAULT, 'timestamp')
 
-        for completed_date_obj in unique_sorted_completed_dates:
-            if completed_date_obj > today_obj: # Ignore future completed dates (should not happen)
-                continue
+    return with_etag(jsonify({
+        'tasks': summary['tasks'],
+        'notes': summary['notes'] or '',
+        'activityLog': activity_log,
+        'activityNextCursor': activity_next_cursor,
+        'streak': summary['streak'] or 0
+    }), etag)
 
-            if last_streak_date is None: # First relevant completed day we are checking
-                if completed_date_obj == today_obj:
-                    current_streak = 1
-                    last_streak_date = completed_date_obj
-                elif completed_date_obj == today_obj - timedelta(days=1): # Streak from yesterday
-                    current_streak = 1 # Will be incremented if more historical dates match
-                    last_streak_date = completed_date_obj
-                # If neither today nor yesterday, streak is 0 unless older dates form a sequence up to yesterday
-            elif last_streak_date - timedelta(days=1) == completed_date_obj:
-                current_streak += 1
-                last_streak_date = completed_date_obj
-            else: # Streak broken
-                # If the first date we found was yesterday, and now there's a gap, current_streak is already 1
-                # If the first date was today, and now there's a gap, current_streak is 1.
-                # If there was a sequence leading up to 'last_streak_date' and now it's broken, stop.
-                break 
-        
-        # If the loop finished and last_streak_date was today, current_streak is already correct.
-        # If today has a completed task but the loop didn't set streak (e.g., no tasks yesterday), ensure it's at least 1.
-        if current_streak == 0 and today_obj in unique_sorted_completed_dates:
-             current_streak = 1
+RANGE_SUMMARY_MAX_DAYS = 42  # Six calendar weeks, the largest month grid
 
+@bp.route('/api/range-summary', methods=['GET'])
+@login_required
+@limiter.limit("60 per minute")
+def get_range_summary():
+    """Tasks, notes, totals and streak for every day of ?from=&to= (inclusive), for week and month views"""
+    try:
+        start = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"error": "from and to must be dates formatted YYYY-MM-DD"}), 400
+    if end < start or (end - start).days >= RANGE_SUMMARY_MAX_DAYS:
+        return jsonify({"error": f"The range must run forwards and span at most {RANGE_SUMMARY_MAX_DAYS} days"}), 400
+
+    dates = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    date_strs = [day.isoformat() for day in dates]
+    etag = compute_etag('range-summary', current_user.id, date_strs[0], date_strs[-1],
+                        *get_data_versions(current_user.id, date_strs + ['tasks']))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
+    # One range read per table in a single round trip; the per-day streaks
+    # come from the few streak runs that overlap the range. As in
+    # /api/daily-summary, last_sync_time is left out because heartbeats bump no version.
+    summary = execute_query(
+        """SELECT
+               (SELECT COALESCE(json_agg(json_build_object(
+                           'id', t.id, 'entry_date', t.entry_date, 'title', t.title, 'description', t.description,
+                           'start_time', t.start_time, 'duration_minutes', t.duration_minutes,
+                           'status', t.status, 'time_spent', t.time_spent,
+                           'timer_start_time', a.started_at, 'timer_session_id', a.session_id)
+                       ORDER BY t.entry_date, t.start_time IS NULL, t.start_time, t.created_at), '[]'::json)
+                FROM user_tasks t
+                LEFT JOIN active_timers a ON a.user_id = t.user_id AND a.task_id = t.id
+                WHERE t.user_id = %(user_id)s AND t.entry_date BETWEEN %(start)s AND %(end)s) AS tasks,
+               (SELECT COALESCE(json_object_agg(entry_date, notes), '{}'::json)
+                FROM daily_entries
+                WHERE user_id = %(user_id)s AND entry_date BETWEEN %(start)s AND %(end)s) AS notes,
+               (SELECT COALESCE(json_object_agg(entry_date, json_build_object(
+                           'total_tasks', total_tasks, 'completed_tasks', completed_tasks,
+                           'total_time_ms', total_time_ms)), '{}'::json)
+                FROM user_daily_stats
+                WHERE user_id = %(user_id)s AND entry_date BETWEEN %(start)s AND %(end)s) AS totals,
+               (SELECT COALESCE(json_agg(json_build_array(start_date, end_date)), '[]'::json)
+                FROM user_streak_runs
+                WHERE user_id = %(user_id)s AND end_date >= %(start)s::date - 1
+                  AND start_date <= %(end)s) AS streak_runs""",
+        {'user_id': current_user.id, 'start': start, 'end': end}, fetch_one=True
+    )
 
-    return jsonify({
-        'tasks': tasks,
-        'notes': notes,
-        'activityLog': activity_log_data,
-        'streak': current_streak
-    })
+    tasks_by_day = {}
+    for task in summary['tasks']:
+        tasks_by_day.setdefault(task.pop('entry_date'), []).append(task)
+    runs = [(date.fromisoformat(run_start), date.fromisoformat(run_end))
+            for run_start, run_end in summary['streak_runs']]
+
+    days = []
+    for day, day_str in zip(dates, date_strs):
+        totals = summary['totals'].get(day_str, {})
+        # Same rule as /api/daily-summary: the run ending on this day or the day before
+        streak = next(((min(run_end, day) - run_start).days + 1
+                       for run_start, run_end in runs
+                       if run_start <= day and run_end >= day - timedelta(days=1)), 0)
+        days.append({
+            'date': day_str,
+            'tasks': tasks_by_day.get(day_str, []),
+            'notes': summary['notes'].get(day_str) or '',
+            'totalTasks': totals.get('total_tasks', 0),
+            'completedTasks': totals.get('completed_tasks', 0),
+            'timeMs': totals.get('total_time_ms', 0),
+            'streak': streak
+        })
+
+    return with_etag(jsonify({'from': date_strs[0], 'to': date_strs[-1], 'days': days}), etag)
 
-@app.route('/api/user-tasks', methods=['POST'])
+@bp.route('/api/user-tasks', methods=['POST'])
 @login_required
 @limiter.limit("30 per minute")  # Prevent rapid task creation spam
 def create_task():
     data = request.json
     try:
-        execute_query(
+        new_task_data = execute_query(
             """INSERT INTO user_tasks (user_id, entry_date, title, description, start_time, duration_minutes, status, time_spent)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id""",
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING *""",
             (current_user.id, data['entry_date'], data['title'], data.get('description', ''), 
-             data.get('start_time') or None, data.get('duration_minutes') or None, 'pending', 0)
+             data.get('start_time') or None, data.get('duration_minutes') or None, 'pending', 0),
+            fetch_one=True, commit=True
         )
-        
-        # Get the new task data
-        new_task_data = execute_query("SELECT * FROM user_tasks WHERE user_id = %s AND entry_date = %s ORDER BY id DESC LIMIT 1", 
-                                     (current_user.id, data['entry_date']), fetch_one=True)
         # Serialize for JSON
         serialized_task = serialize_task_data(dict(new_task_data)) if new_task_data else {}
         return jsonify(serialized_task), 201
@@ -594,7 +1518,7 @@ def create_task():
         return safe_error_response("Failed to create task")
 
 
-@app.route('/api/user-tasks/<int:task_id>', methods=['PUT'])
+@bp.route('/api/user-tasks/<int:task_id>', methods=['PUT'])
 @login_required
 def update_task(task_id):
     data = request.json
@@ -613,11 +1537,13 @@ def update_task(task_id):
         # Serialize for JSON
         serialized_task = serialize_task_data(dict(updated_task_data)) if updated_task_data else {}
         return jsonify(serialized_task)
+    except psycopg2.errors.ExclusionViolation:
+        return jsonify({"error": "Another task is already in progress"}), 409
     except psycopg2.Error as e:
         handle_database_error(e, "task update")
         return safe_error_response("Failed to update task")
 
-@app.route('/api/user-tasks/<int:task_id>/status', methods=['PUT'])
+@bp.route('/api/user-tasks/<int:task_id>/status', methods=['PUT'])
 @login_required
 def update_task_status_and_time(task_id):
     data = request.json
@@ -630,12 +1556,14 @@ def update_task_status_and_time(task_id):
             (data['status'], data['time_spent'], task_id, current_user.id)
         )
         return jsonify({'status': 'success', 'message': 'Task status and time updated.'})
+    except psycopg2.errors.ExclusionViolation:
+        return jsonify({"error": "Another task is already in progress"}), 409
     except psycopg2.Error as e:
         handle_database_error(e, "task status update")
         return safe_error_response("Failed to update task status")
 
 
-@app.route('/api/user-tasks/<int:task_id>', methods=['DELETE'])
+@bp.route('/api/user-tasks/<int:task_id>', methods=['DELETE'])
 @login_required
 def delete_task(task_id):
     task_check = execute_query("SELECT id FROM user_tasks WHERE id = %s AND user_id = %s", (task_id, current_user.id), fetch_one=True)
@@ -649,7 +1577,7 @@ def delete_task(task_id):
         return safe_error_response("Failed to delete task")
 
 
-@app.route('/api/notes/save', methods=['POST'])
+@bp.route('/api/notes/save', methods=['POST'])
 @login_required
 def save_notes_api():
     data = request.json
@@ -666,7 +1594,7 @@ def save_notes_api():
         return safe_error_response("Failed to save notes")
 
 # --- Enhanced Notes API ---
-@app.route('/api/user-notes', methods=['POST'])
+@bp.route('/api/user-notes', methods=['POST'])
 @login_required
 @limiter.limit("20 per minute")  # Prevent rapid note creation spam
 def create_note():
@@ -699,24 +1627,44 @@ def create_note():
         handle_database_error(e, "note creation")
         return safe_error_response("Failed to create note")
 
-@app.route('/api/user-notes', methods=['GET'])
+@bp.route('/api/user-notes', methods=['GET'])
 @login_required
 def get_notes():
-    date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
-    
+    date_str = parse_date_param()
+    if not date_str:
+        return jsonify({"error": "Invalid date format, expected YYYY-MM-DD"}), 400
+    
+    limit, cursor, error = parse_page_params()
+    if error:
+        return jsonify({"error": error}), 400
+    
+    etag = compute_etag('user-notes', current_user.id, date_str, limit, request.args.get('cursor', ''),
+                        *get_data_versions(current_user.id, [date_str]))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+    
+    # Newest first, keyset-paginated on (created_at, id)
+    params = {'user_id': current_user.id, 'date': date_str, 'limit': limit + 1}
+    after_cursor = ''
+    if cursor:
+        params['cursor_ts'], params['cursor_id'] = cursor
+        after_cursor = "AND created_at <= %(cursor_ts)s AND (created_at < %(cursor_ts)s OR id < %(cursor_id)s)"
     notes_raw = execute_query(
-        """SELECT id, title, content, note_type, created_at, updated_at
-           FROM user_notes 
-           WHERE user_id = %s AND entry_date = %s 
-           ORDER BY created_at DESC""",
-        (current_user.id, date_str), fetch_all=True
+        f"""SELECT id, title, content, note_type, created_at, updated_at
+            FROM user_notes 
+            WHERE user_id = %(user_id)s AND entry_date = %(date)s {after_cursor}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %(limit)s""",
+        params, fetch_all=True
     )
+    notes_raw, next_cursor = keyset_page(notes_raw, limit, 'created_at')
     # Serialize notes for JSON
-    notes = [serialize_task_data(dict(row)) for row in notes_raw] if notes_raw else []
+    notes = [serialize_task_data(dict(row)) for row in notes_raw]
     
-    return jsonify({'notes': notes, 'date': date_str})
+    return with_etag(jsonify({'notes': notes, 'date': date_str, 'next_cursor': next_cursor}), etag)
 
-@app.route('/api/user-notes/<int:note_id>', methods=['PUT'])
+@bp.route('/api/user-notes/<int:note_id>', methods=['PUT'])
 @login_required
 def update_note(note_id):
     data = request.json
@@ -751,7 +1699,7 @@ def update_note(note_id):
         handle_database_error(e, "note update")
         return safe_error_response("Failed to update note")
 
-@app.route('/api/user-notes/<int:note_id>', methods=['DELETE'])
+@bp.route('/api/user-notes/<int:note_id>', methods=['DELETE'])
 @login_required
 def delete_note(note_id):
     # Verify note belongs to user
@@ -771,108 +1719,256 @@ def delete_note(note_id):
         handle_database_error(e, "note deletion")
         return safe_error_response("Failed to delete note")
 
-@app.route('/api/analytics', methods=['GET'])
-@login_required
-def get_analytics():
-    # Get user's task statistics
-    total_tasks_result = execute_query(
-        "SELECT COUNT(*) as total FROM user_tasks WHERE user_id = %s", (current_user.id,), fetch_one=True
+# --- Statistics Rollups ---
+WEEKDAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+def get_user_stats(user_id, include_buckets=False):
+    """Read a user's totals (and optionally weekday/month buckets) from the user_stats rollup"""
+    stats = execute_query(
+        "SELECT total_tasks, completed_tasks, total_time_ms FROM user_stats WHERE user_id = %s",
+        (user_id,), fetch_one=True
     )
-    total_tasks = total_tasks_result['total'] if total_tasks_result else 0
-    
-    completed_tasks_result = execute_query(
-        "SELECT COUNT(*) as completed FROM user_tasks WHERE user_id = %s AND status = 'completed'", 
-        (current_user.id,), fetch_one=True
+    result = dict(stats) if stats else {'total_tasks': 0, 'completed_tasks': 0, 'total_time_ms': 0}
+    
+    if include_buckets:
+        buckets = execute_query(
+            """SELECT bucket_type, bucket, completed_tasks, completed_time_ms
+               FROM user_stats_buckets
+               WHERE user_id = %s AND completed_tasks > 0
+               ORDER BY bucket_type, bucket""",
+            (user_id,), fetch_all=True
+        ) or []
+        result['productivity_by_day'] = [
+            {'day_name': WEEKDAY_NAMES[int(row['bucket'])], 'tasks_completed': row['completed_tasks'], 'time_spent': row['completed_time_ms']}
+            for row in buckets if row['bucket_type'] == 'weekday'
+        ]
+        # Last 12 months with completed tasks, most recent first
+        months = [row for row in buckets if row['bucket_type'] == 'month']
+        result['monthly_activity'] = [
+            {'month': row['bucket'], 'tasks_completed': row['completed_tasks'], 'time_spent': row['completed_time_ms']}
+            for row in reversed(months[-12:])
+        ]
+    return result
+
+def get_user_streaks(user_id, as_of=None):
+    """
+    Read current and longest streak from the streak engine.
+    The current streak is the run of completed days ending on as_of (default
+    today) or the day before, counting only days up to as_of.
+    """
+    as_of = as_of or datetime.now().date()
+    streak = execute_query(
+        """SELECT s.current_streak, s.longest_streak, s.last_completed_date,
+                  (SELECT LEAST(r.end_date, %(as_of)s) - r.start_date + 1
+                   FROM user_streak_runs r
+                   WHERE r.user_id = %(user_id)s AND r.start_date <= %(as_of)s
+                     AND r.end_date >= %(as_of)s::date - 1
+                   ORDER BY r.start_date DESC LIMIT 1) AS streak_as_of
+           FROM user_streaks s WHERE s.user_id = %(user_id)s""",
+        {'user_id': user_id, 'as_of': as_of}, fetch_one=True
     )
-    completed_tasks = completed_tasks_result['completed'] if completed_tasks_result else 0
+    if not streak or not streak['last_completed_date']:
+        return {'current_streak': 0, 'longest_streak': 0, 'last_completed_date': None}
     
-    # Get total time worked (in minutes)
-    total_time_result = execute_query(
-        "SELECT SUM(time_spent) as total_time FROM user_tasks WHERE user_id = %s", (current_user.id,), fetch_one=True
+    last_completed = streak['last_completed_date']
+    if last_completed <= as_of:
+        # Common case: the stored streak ends on or before as_of
+        current_streak = streak['current_streak'] if last_completed >= as_of - timedelta(days=1) else 0
+    else:
+        # Completed tasks dated in the future; fall back to the run covering as_of
+        current_streak = streak['streak_as_of'] or 0
+    return {
+        'current_streak': current_streak,
+        'longest_streak': streak['longest_streak'],
+        'last_completed_date': last_completed
+    }
+
+# Recomputes the rollups from user_tasks; shared by rebuild-stats and check-stats
+USER_STATS_SOURCE_SQL = """
+    SELECT user_id, COUNT(*) AS total_tasks,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed_tasks,
+           COALESCE(SUM(time_spent), 0) AS total_time_ms
+    FROM user_tasks
+    WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s
+    GROUP BY user_id
+"""
+
+USER_STATS_BUCKETS_SOURCE_SQL = """
+    SELECT user_id, 'weekday' AS bucket_type, EXTRACT(DOW FROM entry_date)::text AS bucket,
+           COUNT(*) AS completed_tasks, COALESCE(SUM(time_spent), 0) AS completed_time_ms
+    FROM user_tasks
+    WHERE status = 'completed' AND (%(user_id)s::int IS NULL OR user_id = %(user_id)s)
+    GROUP BY user_id, EXTRACT(DOW FROM entry_date)
+    UNION ALL
+    SELECT user_id, 'month', TO_CHAR(entry_date, 'YYYY-MM'),
+           COUNT(*), COALESCE(SUM(time_spent), 0)
+    FROM user_tasks
+    WHERE status = 'completed' AND (%(user_id)s::int IS NULL OR user_id = %(user_id)s)
+    GROUP BY user_id, TO_CHAR(entry_date, 'YYYY-MM')
+"""
+
+USER_DAILY_STATS_SOURCE_SQL = """
+    SELECT user_id, entry_date,
+           COUNT(*) FILTER (WHERE status = 'completed') AS completed_tasks,
+           COUNT(*) AS total_tasks,
+           COALESCE(SUM(time_spent), 0) AS total_time_ms
+    FROM user_tasks
+    WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s
+    GROUP BY user_id, entry_date
+"""
+
+USER_STREAK_RUNS_SOURCE_SQL = """
+    SELECT user_id, MIN(entry_date) AS start_date, MAX(entry_date) AS end_date
+    FROM (SELECT user_id, entry_date,
+                 entry_date - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY entry_date))::int AS island
+          FROM (SELECT DISTINCT user_id, entry_date FROM user_tasks
+                WHERE status = 'completed' AND (%(user_id)s::int IS NULL OR user_id = %(user_id)s)) completed_days
+         ) days
+    GROUP BY user_id, island
+"""
+
+def rebuild_user_stats(user_id=None):
+    """Rebuild the user_stats rollups from user_tasks for one user or everyone"""
+    params = {'user_id': user_id}
+    db = get_db()
+    cursor = db.cursor()
+    try:
+        # Block task writes while rebuilding so trigger updates cannot be lost
+        cursor.execute("LOCK TABLE user_tasks IN SHARE MODE")
+        cursor.execute("DELETE FROM user_stats WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s", params)
+        cursor.execute("DELETE FROM user_stats_buckets WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s", params)
+        cursor.execute(f"INSERT INTO user_stats (user_id, total_tasks, completed_tasks, total_time_ms) {USER_STATS_SOURCE_SQL}", params)
+        rebuilt = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO user_stats_buckets (user_id, bucket_type, bucket, completed_tasks, completed_time_ms) {USER_STATS_BUCKETS_SOURCE_SQL}",
+            params
+        )
+        rebuild_user_streaks(cursor, params)
+        db.commit()
+        return rebuilt
+    except psycopg2.Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def rebuild_user_streaks(cursor, params):
+    """Bulk recompute of the streak engine tables; runs inside rebuild_user_stats' transaction"""
+    for table in ('user_daily_stats', 'user_streak_runs', 'user_streaks'):
+        cursor.execute(f"DELETE FROM {table} WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s", params)
+    cursor.execute(
+        f"INSERT INTO user_daily_stats (user_id, entry_date, completed_tasks, total_tasks, total_time_ms) {USER_DAILY_STATS_SOURCE_SQL}",
+        params
+    )
+    cursor.execute(f"INSERT INTO user_streak_runs (user_id, start_date, end_date) {USER_STREAK_RUNS_SOURCE_SQL}", params)
+    cursor.execute(
+        """INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_completed_date)
+           SELECT DISTINCT ON (user_id) user_id, end_date - start_date + 1,
+                  MAX(end_date - start_date + 1) OVER (PARTITION BY user_id), end_date
+           FROM user_streak_runs
+           WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s
+           ORDER BY user_id, end_date DESC""",
+        params
     )
-    total_time_ms = total_time_result['total_time'] if total_time_result and total_time_result['total_time'] else 0
-    total_time_hours = total_time_ms / (1000 * 60 * 60)  # Convert to hours
-    
-    # Get productivity by day of week (PostgreSQL version)
-    productivity_data = execute_query("""
-        SELECT 
-            CASE EXTRACT(DOW FROM entry_date::date)
-                WHEN 0 THEN 'Sunday'
-                WHEN 1 THEN 'Monday' 
-                WHEN 2 THEN 'Tuesday'
-                WHEN 3 THEN 'Wednesday'
-                WHEN 4 THEN 'Thursday'
-                WHEN 5 THEN 'Friday'
-                WHEN 6 THEN 'Saturday'
-            END as day_name,
-            COUNT(*) as tasks_completed,
-            SUM(time_spent) as time_spent
-        FROM user_tasks 
-        WHERE user_id = %s AND status = 'completed'
-        GROUP BY EXTRACT(DOW FROM entry_date::date)
-        ORDER BY EXTRACT(DOW FROM entry_date::date)
-    """, (current_user.id,), fetch_all=True)
-    
-    productivity_by_day = [dict(row) for row in productivity_data] if productivity_data else []
-    
-    # Get current streak
-    streak_data = execute_query("""
-        SELECT DISTINCT entry_date FROM user_tasks 
-        WHERE user_id = %s AND status = 'completed' 
-        ORDER BY entry_date DESC
-    """, (current_user.id,), fetch_all=True)
-    
-    completed_dates = [str(row['entry_date']) for row in streak_data] if streak_data else []
-    current_streak = calculate_streak(completed_dates)
-    
-    # Get monthly activity (last 12 months) - PostgreSQL version
-    monthly_data = execute_query("""
-        SELECT 
-            TO_CHAR(entry_date::date, 'YYYY-MM') as month,
-            COUNT(*) as tasks_completed,
-            SUM(time_spent) as time_spent
-        FROM user_tasks 
-        WHERE user_id = %s AND status = 'completed'
-        GROUP BY TO_CHAR(entry_date::date, 'YYYY-MM')
-        ORDER BY month DESC
-        LIMIT 12
-    """, (current_user.id,), fetch_all=True)
-    
-    monthly_activity = [dict(row) for row in monthly_data] if monthly_data else []
+
+def check_user_stats(user_id=None):
+    """Compare the rollups and streaks with user_tasks; returns the ids of users whose stats drifted"""
+    params = {'user_id': user_id}
+    drifted = execute_query(
+        f"""WITH expected AS ({USER_STATS_SOURCE_SQL}),
+                 expected_buckets AS ({USER_STATS_BUCKETS_SOURCE_SQL}),
+                 actual AS (
+                     SELECT user_id, total_tasks, completed_tasks, total_time_ms FROM user_stats
+                     WHERE (%(user_id)s::int IS NULL OR user_id = %(user_id)s)
+                       AND (total_tasks, completed_tasks, total_time_ms) <> (0, 0, 0)
+                 ),
+                 actual_buckets AS (
+                     SELECT user_id, bucket_type, bucket, completed_tasks, completed_time_ms FROM user_stats_buckets
+                     WHERE (%(user_id)s::int IS NULL OR user_id = %(user_id)s) AND completed_tasks <> 0
+                 ),
+                 expected_daily AS ({USER_DAILY_STATS_SOURCE_SQL}),
+                 actual_daily AS (
+                     SELECT user_id, entry_date, completed_tasks, total_tasks, total_time_ms FROM user_daily_stats
+                     WHERE (%(user_id)s::int IS NULL OR user_id = %(user_id)s)
+                       AND (completed_tasks, total_tasks, total_time_ms) <> (0, 0, 0)
+                 ),
+                 expected_runs AS ({USER_STREAK_RUNS_SOURCE_SQL}),
+                 actual_runs AS (
+                     SELECT user_id, start_date, end_date FROM user_streak_runs
+                     WHERE %(user_id)s::int IS NULL OR user_id = %(user_id)s
+                 )
+            SELECT user_id FROM ((SELECT * FROM expected EXCEPT SELECT * FROM actual)
+                                 UNION (SELECT * FROM actual EXCEPT SELECT * FROM expected)) totals_diff
+            UNION
+            SELECT user_id FROM ((SELECT * FROM expected_buckets EXCEPT SELECT * FROM actual_buckets)
+                                 UNION (SELECT * FROM actual_buckets EXCEPT SELECT * FROM expected_buckets)) buckets_diff
+            UNION
+            SELECT user_id FROM ((SELECT * FROM expected_daily EXCEPT SELECT * FROM actual_daily)
+                                 UNION (SELECT * FROM actual_daily EXCEPT SELECT * FROM expected_daily)) daily_diff
+            UNION
+            SELECT user_id FROM ((SELECT * FROM expected_runs EXCEPT SELECT * FROM actual_runs)
+                                 UNION (SELECT * FROM actual_runs EXCEPT SELECT * FROM expected_runs)) runs_diff
+            UNION
+            SELECT s.user_id FROM user_streaks s
+            LEFT JOIN (SELECT DISTINCT ON (user_id) user_id, end_date - start_date + 1 AS current_streak,
+                              MAX(end_date - start_date + 1) OVER (PARTITION BY user_id) AS longest_streak,
+                              end_date AS last_completed_date
+                       FROM expected_runs ORDER BY user_id, end_date DESC) e ON e.user_id = s.user_id
+            WHERE (%(user_id)s::int IS NULL OR s.user_id = %(user_id)s)
+              AND (s.current_streak, s.longest_streak) <> (COALESCE(e.current_streak, 0), COALESCE(e.longest_streak, 0))
+            ORDER BY user_id""",
+        params, fetch_all=True
+    )
+    return [row['user_id'] for row in drifted] if drifted else []
+
+@bp.cli.command('rebuild-stats')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user (default: all users)')
+def rebuild_stats_command(user_id):
+    """Backfill or repair the user_stats and streak rollups from user_tasks"""
+    rebuilt = rebuild_user_stats(user_id)
+    print(f"Rebuilt statistics for {rebuilt} user(s).")
+
+@bp.cli.command('check-stats')
+@click.option('--user-id', type=int, default=None, help='Only check this user (default: all users)')
+def check_stats_command(user_id):
+    """Verify the user_stats and streak rollups against user_tasks"""
+    drifted = check_user_stats(user_id)
+    if drifted:
+        print(f"Statistics out of date for {len(drifted)} user(s): {', '.join(str(u) for u in drifted)}")
+        print("Run: flask rebuild-stats")
+        sys.exit(1)
+    print("Statistics are consistent with user_tasks.")
+
+@bp.route('/api/analytics', methods=['GET'])
+@login_required
+def get_analytics():
+    # The current streak is relative to today, so the date is part of the ETag
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    etag = compute_etag('analytics', current_user.id, today_str, *get_data_versions(current_user.id, ['tasks']))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+    
+    # Totals and buckets come from the incrementally maintained user_stats rollup
+    stats = get_user_stats(current_user.id, include_buckets=True)
+    total_tasks = stats['total_tasks']
+    completed_tasks = stats['completed_tasks']
+    total_time_hours = stats['total_time_ms'] / (1000 * 60 * 60)  # Convert to hours
+    
+    current_streak = get_user_streaks(current_user.id)['current_streak']
     
     # Get achievements
     achievements = calculate_achievements(current_user.id, total_tasks, completed_tasks, total_time_hours, current_streak)
     
-    return jsonify({
+    return with_etag(jsonify({
         'totalTasks': total_tasks,
         'completedTasks': completed_tasks,
         'totalTimeHours': round(total_time_hours, 1),
         'currentStreak': current_streak,
-        'productivityByDay': productivity_by_day,
-        'monthlyActivity': monthly_activity,
+        'productivityByDay': stats['productivity_by_day'],
+        'monthlyActivity': stats['monthly_activity'],
         'achievements': achievements
-    })
-
-def calculate_streak(completed_dates):
-    if not completed_dates:
-        return 0
-    
-    from datetime import datetime, timedelta, date
-    today = datetime.now().date()
-    current_streak = 0
-    
-    # Convert strings to dates and sort
-    dates = sorted([datetime.strptime(d, '%Y-%m-%d').date() for d in completed_dates], reverse=True)
-    
-    # Check for current streak
-    for i, date in enumerate(dates):
-        expected_date = today - timedelta(days=i)
-        if date == expected_date:
-            current_streak += 1
-        else:
-            break
-    
-    return current_streak
+    }), etag)
 
 def calculate_achievements(user_id, total_tasks, completed_tasks, total_hours, streak):
     achievements = []
@@ -905,42 +2001,18 @@ def calculate_achievements(user_id, total_tasks, completed_tasks, total_hours, s
     
     return achievements
 
-@app.route('/api/profile/stats', methods=['GET'])
+@bp.route('/api/profile/stats', methods=['GET'])
 @login_required
 def get_profile_stats():
     """Get comprehensive profile statistics for the user"""
+    stats = get_user_stats(current_user.id)
+    total_tasks = stats['total_tasks']
+    completed_tasks = stats['completed_tasks']
+    total_hours = round(stats['total_time_ms'] / (1000 * 60 * 60), 1)
     
-    # Get total tasks
-    total_tasks_result = execute_query(
-        "SELECT COUNT(*) as total FROM user_tasks WHERE user_id = %s", (current_user.id,), fetch_one=True
-    )
-    total_tasks = total_tasks_result['total'] if total_tasks_result else 0
-    
-    # Get completed tasks
-    completed_tasks_result = execute_query(
-        "SELECT COUNT(*) as completed FROM user_tasks WHERE user_id = %s AND status = 'completed'", 
-        (current_user.id,), fetch_one=True
-    )
-    completed_tasks = completed_tasks_result['completed'] if completed_tasks_result else 0
-    
-    # Get total time worked (in hours)
-    total_time_result = execute_query(
-        "SELECT SUM(time_spent) as total_time FROM user_tasks WHERE user_id = %s", (current_user.id,), fetch_one=True
-    )
-    total_time_ms = total_time_result['total_time'] if total_time_result and total_time_result['total_time'] else 0
-    total_hours = round(total_time_ms / (1000 * 60 * 60), 1)
-    
-    # Get current streak
-    streak_data = execute_query("""
-        SELECT DISTINCT entry_date FROM user_tasks 
-        WHERE user_id = %s AND status = 'completed' 
-        ORDER BY entry_date DESC
-    """, (current_user.id,), fetch_all=True)
-    completed_dates = [str(row['entry_date']) for row in streak_data] if streak_data else []
-    current_streak = calculate_streak(completed_dates)
-    
-    # Calculate longest streak
-    longest_streak = calculate_longest_streak(completed_dates)
+    streaks = get_user_streaks(current_user.id)
+    current_streak = streaks['current_streak']
+    longest_streak = streaks['longest_streak']
     
     # Get achievements count
     achievements = calculate_achievements(current_user.id, total_tasks, completed_tasks, total_hours, current_streak)
@@ -955,30 +2027,44 @@ def get_profile_stats():
         'achievementsCount': achievements_count
     })
 
-def calculate_longest_streak(completed_dates):
-    """Calculate the longest streak from completed dates"""
-    if not completed_dates:
-        return 0
-    
-    # Convert strings to dates and sort
-    dates = sorted([datetime.strptime(d, '%Y-%m-%d').date() for d in completed_dates])
-    
-    if not dates:
-        return 0
-    
-    longest_streak = 1
-    current_streak = 1
-    
-    for i in range(1, len(dates)):
-        if dates[i] == dates[i-1] + timedelta(days=1):
-            current_streak += 1
-            longest_streak = max(longest_streak, current_streak)
-        else:
-            current_streak = 1
-    
-    return longest_streak
-
-@app.route('/api/activity/log', methods=['POST'])
+@bp.route('/api/heatmap', methods=['GET'])
+@login_required
+@limiter.limit("60 per minute")
+def get_heatmap():
+    """Per-day task counts and tracked time for a calendar year, from the user_daily_stats rollup"""
+    year = request.args.get('year', type=int) or datetime.now().year
+    if not 1900 <= year <= 9999:
+        return jsonify({"error": "Invalid year"}), 400
+
+    etag = compute_etag('heatmap', current_user.id, year, *get_data_versions(current_user.id, ['tasks']))
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+
+    # One range read on the (user_id, entry_date) primary key; days without tasks are omitted
+    rows = execute_query(
+        """SELECT entry_date, total_tasks, completed_tasks, total_time_ms
+           FROM user_daily_stats
+           WHERE user_id = %s AND entry_date BETWEEN %s AND %s AND total_tasks > 0
+           ORDER BY entry_date""",
+        (current_user.id, date(year, 1, 1), date(year, 12, 31)), fetch_all=True
+    ) or []
+
+    days = [
+        {'date': row['entry_date'].isoformat(), 'totalTasks': row['total_tasks'],
+         'completedTasks': row['completed_tasks'], 'timeMs': row['total_time_ms']}
+        for row in rows
+    ]
+    return with_etag(jsonify({
+        'year': year,
+        'days': days,
+        'totalTasks': sum(day['totalTasks'] for day in days),
+        'completedTasks': sum(day['completedTasks'] for day in days),
+        'totalTimeMs': sum(day['timeMs'] for day in days),
+        'maxTimeMs': max((day['timeMs'] for day in days), default=0)
+    }), etag)
+
+@bp.route('/api/activity/log', methods=['POST'])
 @login_required
 def log_activity_api():
     data = request.json
@@ -992,8 +2078,88 @@ def log_activity_api():
         handle_database_error(e, "activity logging")
         return safe_error_response("Failed to log activity")
 
+def fetch_activity_page(user_id, limit, cursor=None, day=None):
+    """
+    Newest-first activity for the user, keyset-paginated on (timestamp, id) so
+    every page is an index range scan on (user_id, timestamp). day (YYYY-MM-DD)
+    restricts it to one date.
+    """
+    params = {'user_id': user_id, 'limit': limit + 1}
+    conditions = ['user_id = %(user_id)s']
+    if day:
+        params['day'] = day
+        conditions.append("timestamp >= %(day)s::date AND timestamp < %(day)s::date + 1")
+    if cursor:
+        params['cursor_ts'], params['cursor_id'] = cursor
+        conditions.append("timestamp <= %(cursor_ts)s AND (timestamp < %(cursor_ts)s OR id < %(cursor_id)s)")
+    rows = execute_query(
+        f"""SELECT id, message, timestamp, task_db_id FROM activity_log
+            WHERE {' AND '.join(conditions)}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT %(limit)s""",
+        params, fetch_all=True
+    )
+    rows, next_cursor = keyset_page(rows, limit, 'timestamp')
+    activity = [{**row, 'timestamp': row['timestamp'].isoformat()} for row in rows]
+    return activity, next_cursor
+
+@bp.route('/api/activity-log', methods=['GET'])
+@login_required
+def get_activity_log():
+    """One day's activity (?date=, default today), newest first, ?limit= entries per page"""
+    date_str = parse_date_param()
+    if not date_str:
+        return jsonify({"error": "Invalid date format, expected YYYY-MM-DD"}), 400
+    limit, cursor, error = parse_page_params()
+    if error:
+        return jsonify({"error": error}), 400
+    
+    activity, next_cursor = fetch_activity_page(current_user.id, limit, cursor, day=date_str)
+    return jsonify({'activity': activity, 'date': date_str, 'next_cursor': next_cursor})
+
+@bp.route('/api/activity-feed', methods=['GET'])
+@login_required
+def get_activity_feed():
+    """Activity across all days, newest first; follow next_cursor for older entries"""
+    limit, cursor, error = parse_page_params()
+    if error:
+        return jsonify({"error": error}), 400
+    
+    activity, next_cursor = fetch_activity_page(current_user.id, limit, cursor)
+    return jsonify({'activity': activity, 'next_cursor': next_cursor})
+
 # --- Timer Management API ---
-@app.route('/api/timer/start', methods=['POST'])
+# Milliseconds between a timer's started_at and the %(now)s parameter
+TIMER_ELAPSED_MS_SQL = "FLOOR(EXTRACT(EPOCH FROM (%(now)s - started_at)) * 1000)::bigint"
+
+# Timer start as a single statement. Returns the task's status before the start
+# (no row if the task is not the user's); completed tasks are left untouched.
+START_TIMER_SQL = """
+    WITH task AS (
+        SELECT id, status FROM user_tasks
+        WHERE id = %(task_id)s AND user_id = %(user_id)s
+    ), timer AS (
+        INSERT INTO active_timers (user_id, task_id, session_id, started_at, last_sync_time)
+        SELECT %(user_id)s, id, %(session_id)s, %(now)s, %(now)s
+        FROM task WHERE status <> 'completed'
+        ON CONFLICT (user_id) DO UPDATE SET
+            task_id = EXCLUDED.task_id,
+            session_id = EXCLUDED.session_id,
+            started_at = EXCLUDED.started_at,
+            last_sync_time = EXCLUDED.last_sync_time
+        RETURNING task_id
+    ), paused AS (
+        UPDATE user_tasks SET status = 'paused'
+        WHERE user_id = %(user_id)s AND status = 'in-progress' AND id <> %(task_id)s
+          AND EXISTS (SELECT 1 FROM timer)
+    ), started AS (
+        UPDATE user_tasks SET status = 'in-progress'
+        WHERE id IN (SELECT task_id FROM timer) AND status <> 'in-progress'
+    )
+    SELECT id, status FROM task
+"""
+
+@bp.route('/api/timer/start', methods=['POST'])
 @login_required
 @csrf.exempt  # Will handle CSRF in the function
 def start_timer():
@@ -1006,39 +2172,31 @@ def start_timer():
     
     task_id = int(data.get('task_id'))  # Convert to int after validation
     session_id = data.get('session_id')
-    
-    # Verify task belongs to user
-    task = execute_query("SELECT id, status FROM user_tasks WHERE id = %s AND user_id = %s", 
-                     (task_id, current_user.id), fetch_one=True)
-    if not task:
-        return jsonify({"error": "Task not found or unauthorized"}), 404
-    
-    if task['status'] == 'completed':
-        return jsonify({"error": "Cannot start timer for completed task"}), 400
+    now = datetime.now()
     
     try:
-        # Stop any other running timers for this user and clean up stale sessions
-        execute_query(
-            """UPDATE user_tasks SET 
-               status = CASE WHEN status = 'in-progress' THEN 'paused' ELSE status END,
-               timer_start_time = NULL, 
-               timer_session_id = NULL,
-               last_sync_time = NULL
-               WHERE user_id = %s AND (timer_start_time IS NOT NULL OR timer_session_id IS NOT NULL)""",
-            (current_user.id,)
-        )
+        # One statement: take the user's timer slot (replacing any session from
+        # another tab or device), pause whatever else is in progress and start
+        # this task. A concurrent start that we could not see trips the deferred
+        # one-in-progress constraint at commit; retrying then sees and pauses it.
+        for attempt in range(2):
+            try:
+                task = execute_query(
+                    START_TIMER_SQL,
+                    {'user_id': current_user.id, 'task_id': task_id,
+                     'session_id': session_id, 'now': now},
+                    fetch_one=True, commit=True
+                )
+                break
+            except psycopg2.errors.ExclusionViolation:
+                if attempt:
+                    raise
         
-        # Start the new timer
-        now = datetime.now()
-        execute_query(
-            """UPDATE user_tasks SET 
-               status = 'in-progress',
-               timer_start_time = %s,
-               timer_session_id = %s,
-               last_sync_time = %s
-               WHERE id = %s AND user_id = %s""",
-            (now, session_id, now, task_id, current_user.id)
-        )
+        if not task:
+            return jsonify({"error": "Task not found or unauthorized"}), 404
+        
+        if task['status'] == 'completed':
+            return jsonify({"error": "Cannot start timer for completed task"}), 400
         
         return jsonify({
             'status': 'success',
@@ -1049,7 +2207,7 @@ def start_timer():
         handle_database_error(e, "timer start")
         return safe_error_response("Failed to start timer")
 
-@app.route('/api/timer/pause', methods=['POST'])
+@bp.route('/api/timer/pause', methods=['POST'])
 @login_required
 @csrf.exempt  # Will handle CSRF in the function
 def pause_timer():
@@ -1060,49 +2218,37 @@ def pause_timer():
     if not task_id or not session_id:
         return jsonify({"error": "task_id and session_id are required"}), 400
     
-    # Get current timer state
-    task = execute_query(
-        """SELECT timer_start_time, timer_session_id, time_spent 
-           FROM user_tasks 
-           WHERE id = %s AND user_id = %s AND timer_session_id = %s""",
-        (task_id, current_user.id, session_id), fetch_one=True
-    )
-    
-    if not task or not task['timer_start_time']:
-        return jsonify({"error": "No active timer found for this task"}), 400
-    
     try:
-        # Calculate elapsed time
-        # Handle both datetime objects and ISO strings
-        if isinstance(task['timer_start_time'], str):
-            start_time = datetime.fromisoformat(task['timer_start_time'])
-        else:
-            start_time = task['timer_start_time']
-        elapsed_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-        new_time_spent = task['time_spent'] + elapsed_ms
-        
-        # Pause the timer
-        execute_query(
-            """UPDATE user_tasks SET 
-               status = 'paused',
-               time_spent = %s,
-               timer_start_time = NULL,
-               timer_session_id = NULL,
-               last_sync_time = %s
-               WHERE id = %s AND user_id = %s""",
-            (new_time_spent, datetime.now(), task_id, current_user.id)
+        # End the session and credit its elapsed time in one statement
+        task = execute_query(
+            """WITH timer AS (
+                   DELETE FROM active_timers
+                   WHERE user_id = %(user_id)s AND task_id = %(task_id)s AND session_id = %(session_id)s
+                   RETURNING task_id, """ + TIMER_ELAPSED_MS_SQL + """ AS elapsed_ms
+               )
+               UPDATE user_tasks t
+               SET status = 'paused', time_spent = t.time_spent + timer.elapsed_ms
+               FROM timer
+               WHERE t.id = timer.task_id
+               RETURNING t.time_spent, timer.elapsed_ms""",
+            {'user_id': current_user.id, 'task_id': task_id,
+             'session_id': session_id, 'now': datetime.now()},
+            fetch_one=True, commit=True
         )
         
+        if not task:
+            return jsonify({"error": "No active timer found for this task"}), 400
+        
         return jsonify({
             'status': 'success',
-            'time_spent': new_time_spent,
-            'elapsed_in_session': elapsed_ms
+            'time_spent': task['time_spent'],
+            'elapsed_in_session': task['elapsed_ms']
         })
     except psycopg2.Error as e:
         handle_database_error(e, "timer pause")
         return safe_error_response("Failed to pause timer")
 
-@app.route('/api/timer/stop', methods=['POST'])
+@bp.route('/api/timer/stop', methods=['POST'])
 @login_required
 @csrf.exempt  # Will handle CSRF in the function
 def stop_timer():
@@ -1113,58 +2259,101 @@ def stop_timer():
     if not task_id or not session_id:
         return jsonify({"error": "task_id and session_id are required"}), 400
     
-    # Get current timer state
-    task = execute_query(
-        """SELECT timer_start_time, timer_session_id, time_spent, title 
-           FROM user_tasks 
-           WHERE id = %s AND user_id = %s AND timer_session_id = %s""",
-        (task_id, current_user.id, session_id), fetch_one=True
-    )
-    
-    if not task:
-        return jsonify({"error": "Task not found or session mismatch"}), 400
-    
     try:
-        # Calculate elapsed time if timer was running
-        elapsed_ms = 0
-        if task['timer_start_time']:
-            # Handle both datetime objects and ISO strings
-            if isinstance(task['timer_start_time'], str):
-                start_time = datetime.fromisoformat(task['timer_start_time'])
-            else:
-                start_time = task['timer_start_time']
-            elapsed_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-        
-        new_time_spent = task['time_spent'] + elapsed_ms
-        
-        # Stop the timer and mark as completed
-        execute_query(
-            """UPDATE user_tasks SET 
-               status = 'completed',
-               time_spent = %s,
-               timer_start_time = NULL,
-               timer_session_id = NULL,
-               last_sync_time = %s
-               WHERE id = %s AND user_id = %s""",
-            (new_time_spent, datetime.now(), task_id, current_user.id)
+        # End the session, complete the task and log it in one statement
+        task = execute_query(
+            """WITH timer AS (
+                   DELETE FROM active_timers
+                   WHERE user_id = %(user_id)s AND task_id = %(task_id)s AND session_id = %(session_id)s
+                   RETURNING task_id, """ + TIMER_ELAPSED_MS_SQL + """ AS elapsed_ms
+               ), stopped AS (
+                   UPDATE user_tasks t
+                   SET status = 'completed', time_spent = t.time_spent + timer.elapsed_ms
+                   FROM timer
+                   WHERE t.id = timer.task_id
+                   RETURNING t.id, t.title, t.time_spent, timer.elapsed_ms
+               ), logged AS (
+                   INSERT INTO activity_log (user_id, message, timestamp, task_db_id)
+                   SELECT %(user_id)s, 'Completed task: ' || title, %(now)s, id FROM stopped
+               )
+               SELECT time_spent, elapsed_ms FROM stopped""",
+            {'user_id': current_user.id, 'task_id': task_id,
+             'session_id': session_id, 'now': datetime.now()},
+            fetch_one=True, commit=True
         )
         
-        # Log the completion
-        execute_query(
-            "INSERT INTO activity_log (user_id, message, timestamp, task_db_id) VALUES (%s, %s, %s, %s)",
-            (current_user.id, f"Completed task: {task['title']}", datetime.now(), task_id)
-        )
+        if not task:
+            return jsonify({"error": "Task not found or session mismatch"}), 400
         
         return jsonify({
             'status': 'success',
-            'time_spent': new_time_spent,
-            'elapsed_in_session': elapsed_ms
+            'time_spent': task['time_spent'],
+            'elapsed_in_session': task['elapsed_ms']
         })
     except psycopg2.Error as e:
         handle_database_error(e, "timer stop")
         return safe_error_response("Failed to stop timer")
 
-@app.route('/api/timer/sync', methods=['POST'])
+# Upper bound on task/session pairs accepted by one batch sync request
+TIMER_SYNC_BATCH_LIMIT = 50
+
+# Timer heartbeat as a single statement: refreshes last_sync_time for every
+# pair whose session is still current and reports each pair in request order
+SYNC_TIMERS_SQL = """
+    WITH requested AS (
+        SELECT * FROM unnest(%(task_ids)s::int[], %(session_ids)s::text[]) WITH ORDINALITY
+            AS r(task_id, session_id, position)
+    ), synced AS (
+        UPDATE active_timers a SET last_sync_time = %(now)s
+        FROM requested r
+        WHERE a.user_id = %(user_id)s AND a.task_id = r.task_id AND a.session_id = r.session_id
+        RETURNING a.task_id, a.session_id, a.started_at, """ + TIMER_ELAPSED_MS_SQL + """ AS elapsed_ms
+    )
+    SELECT r.task_id, t.id IS NOT NULL AS found, s.task_id IS NOT NULL AS synced,
+           t.status, t.time_spent, s.started_at AS timer_start_time,
+           CASE WHEN t.status = 'in-progress' THEN s.elapsed_ms ELSE 0 END AS elapsed_ms
+    FROM requested r
+    LEFT JOIN user_tasks t ON t.id = r.task_id AND t.user_id = %(user_id)s
+    LEFT JOIN synced s ON s.task_id = r.task_id AND s.session_id = r.session_id
+    ORDER BY r.position
+"""
+
+def sync_timer_sessions(user_id, pairs):
+    """Heartbeat several (task_id, session_id) pairs; returns one state dict per pair, in request order"""
+    rows = execute_query(
+        SYNC_TIMERS_SQL,
+        {
+            'task_ids': [int(task_id) for task_id, _ in pairs],
+            'session_ids': [session_id for _, session_id in pairs],
+            'now': datetime.now(),
+            'user_id': user_id,
+        },
+        fetch_all=True, commit=True
+    )
+
+    results = []
+    for row in rows or []:
+        if not row['found']:
+            results.append({'task_id': row['task_id'], 'status': 'not_found'})
+        elif not row['synced']:
+            results.append({
+                'task_id': row['task_id'],
+                'status': 'session_invalid',
+                'message': 'Timer session is no longer valid'
+            })
+        else:
+            results.append({
+                'task_id': row['task_id'],
+                'status': 'success',
+                'task_status': row['status'],
+                'time_spent': row['time_spent'],
+                'current_session_elapsed': row['elapsed_ms'],
+                'total_display_time': row['time_spent'] + row['elapsed_ms'],
+                'timer_start_time': row['timer_start_time']
+            })
+    return results
+
+@bp.route('/api/timer/sync', methods=['POST'])
 @login_required
 @csrf.exempt  # Will handle CSRF in the function
 @limiter.limit("1000 per minute")  # Support concurrent timer sessions (was 120)
@@ -1175,55 +2364,54 @@ def sync_timer():
     
     if not task_id or not session_id:
         return jsonify({"error": "task_id and session_id are required"}), 400
+    if not is_valid_task_id(task_id):
+        return jsonify({"error": "Invalid task ID format"}), 400
     
-    # Get current timer state
-    task = execute_query(
-        """SELECT timer_start_time, timer_session_id, time_spent, status, title
-           FROM user_tasks 
-           WHERE id = %s AND user_id = %s""",
-        (task_id, current_user.id), fetch_one=True
-    )
+    try:
+        result = sync_timer_sessions(current_user.id, [(task_id, session_id)])[0]
+    except psycopg2.Error as e:
+        handle_database_error(e, "timer sync")
+        return safe_error_response("Failed to sync timer")
     
-    if not task:
+    if result['status'] == 'not_found':
         return jsonify({"error": "Task not found"}), 404
     
-    # Check if session is still valid
-    if task['timer_session_id'] != session_id:
-        return jsonify({
-            'status': 'session_invalid',
-            'message': 'Timer session is no longer valid'
-        }), 200
+    # Keep the single-task response shape
+    result.pop('task_id')
+    if result['status'] == 'session_invalid':
+        return jsonify(result), 200
+    return jsonify(result)
+
+@bp.route('/api/timer/sync-batch', methods=['POST'])
+@login_required
+@limiter.limit("240 per minute")  # One request covers every timer of a client
+def sync_timer_batch():
+    """Heartbeat every timer of a client (several tabs or devices) in one request"""
+    data = request.json
+    timers = data.get('timers') if isinstance(data, dict) else None
     
-    # Calculate current elapsed time
-    current_elapsed_ms = 0
-    if task['timer_start_time'] and task['status'] == 'in-progress':
-        # Handle both datetime objects and ISO strings
-        if isinstance(task['timer_start_time'], str):
-            start_time = datetime.fromisoformat(task['timer_start_time'])
-        else:
-            start_time = task['timer_start_time']
-        current_elapsed_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+    if not isinstance(timers, list) or not timers:
+        return jsonify({"error": "timers must be a non-empty list of {task_id, session_id}"}), 400
+    if len(timers) > TIMER_SYNC_BATCH_LIMIT:
+        return jsonify({"error": f"At most {TIMER_SYNC_BATCH_LIMIT} timers per request"}), 400
+    
+    pairs = []
+    for timer in timers:
+        # Security: Validate every entry like a single timer request
+        is_valid, error_msg = validate_timer_request(timer if isinstance(timer, dict) else None, ['task_id', 'session_id'])
+        if not is_valid:
+            return jsonify({"error": error_msg}), 400
+        pairs.append((int(timer['task_id']), timer['session_id']))
     
     try:
-        # Update last sync time
-        execute_query(
-            "UPDATE user_tasks SET last_sync_time = %s WHERE id = %s AND user_id = %s",
-            (datetime.now(), task_id, current_user.id)
-        )
-        
-        return jsonify({
-            'status': 'success',
-            'task_status': task['status'],
-            'time_spent': task['time_spent'],
-            'current_session_elapsed': current_elapsed_ms,
-            'total_display_time': task['time_spent'] + current_elapsed_ms,
-            'timer_start_time': task['timer_start_time']
-        })
+        results = sync_timer_sessions(current_user.id, pairs)
     except psycopg2.Error as e:
-        handle_database_error(e, "timer sync")
-        return safe_error_response("Failed to sync timer")
+        handle_database_error(e, "timer batch sync")
+        return safe_error_response("Failed to sync timers")
+    
+    return jsonify({'status': 'success', 'timers': results})
 
-@app.route('/api/timer/cleanup', methods=['POST'])
+@bp.route('/api/timer/cleanup', methods=['POST'])
 @login_required
 @csrf.exempt
 def cleanup_timer():
@@ -1237,37 +2425,42 @@ def cleanup_timer():
     task_id = int(data.get('task_id'))
     session_id = data.get('session_id')
     
-    # Verify task belongs to user
-    task = execute_query("SELECT id FROM user_tasks WHERE id = %s AND user_id = %s", 
-                         (task_id, current_user.id), fetch_one=True)
-    if not task:
-        return jsonify({"error": "Task not found or unauthorized"}), 404
-    
     try:
         # Clean up stale timer session
-        execute_query(
-            """UPDATE user_tasks SET 
-               status = CASE WHEN status = 'in-progress' THEN 'paused' ELSE status END,
-               timer_start_time = NULL, 
-               timer_session_id = NULL,
-               last_sync_time = NULL
-               WHERE id = %s AND user_id = %s AND timer_session_id = %s""",
-            (task_id, current_user.id, session_id)
+        task = execute_query(
+            """WITH task AS (
+                   SELECT id FROM user_tasks WHERE id = %(task_id)s AND user_id = %(user_id)s
+               ), timer AS (
+                   DELETE FROM active_timers
+                   WHERE user_id = %(user_id)s AND session_id = %(session_id)s
+                     AND task_id IN (SELECT id FROM task)
+                   RETURNING task_id
+               ), paused AS (
+                   UPDATE user_tasks SET status = 'paused'
+                   WHERE id IN (SELECT task_id FROM timer) AND status = 'in-progress'
+               )
+               SELECT id FROM task""",
+            {'user_id': current_user.id, 'task_id': task_id, 'session_id': session_id},
+            fetch_one=True, commit=True
         )
+        if not task:
+            return jsonify({"error": "Task not found or unauthorized"}), 404
         
         return jsonify({'status': 'success'})
     except psycopg2.Error as e:
         handle_database_error(e, "timer cleanup")
         return safe_error_response("Failed to cleanup timer")
 
-@app.route('/api/timer/status/<int:task_id>', methods=['GET'])
+@bp.route('/api/timer/status/<int:task_id>', methods=['GET'])
 @login_required
 @limiter.limit("1000 per minute")  # Support concurrent timer sessions (was 120)
 def get_timer_status(task_id):
     task = execute_query(
-        """SELECT status, time_spent, timer_start_time, timer_session_id, title
-           FROM user_tasks 
-           WHERE id = %s AND user_id = %s""",
+        """SELECT t.status, t.time_spent, a.started_at AS timer_start_time,
+                  a.session_id AS timer_session_id, t.title
+           FROM user_tasks t
+           LEFT JOIN active_timers a ON a.user_id = t.user_id AND a.task_id = t.id
+           WHERE t.id = %s AND t.user_id = %s""",
         (task_id, current_user.id), fetch_one=True
     )
     
@@ -1295,10 +2488,1017 @@ def get_timer_status(task_id):
         'title': task['title']
     })
 
+# --- Abandoned Timer Reaper ---
+# Timers whose heartbeat (/api/timer/sync, every minute while running) has lapsed
+# for this long belong to crashed or closed tabs
+TIMER_STALE_AFTER_SECONDS = int(os.environ.get('TIMER_STALE_AFTER', '600'))
+TIMER_REAPER_BATCH_SIZE = int(os.environ.get('TIMER_REAPER_BATCH_SIZE', '500'))
+# Seconds between in-process reaper runs in each worker; 0 leaves it to `flask reap-timers`
+TIMER_REAPER_INTERVAL = int(os.environ.get('TIMER_REAPER_INTERVAL', '0'))
+
+# Pauses one batch of stale timers, crediting each task with the time up to its
+# last heartbeat. SKIP LOCKED lets several workers reap concurrently, and the
+# cutoff is re-checked against rows a heartbeat updated while we waited.
+# active_timers holds one row per running timer and is scanned without an
+# index: indexing last_sync_time would stop heartbeats from being HOT updates
+REAP_STALE_TIMERS_SQL = """
+    WITH stale AS (
+        SELECT user_id FROM active_timers
+        WHERE last_sync_time < %(cutoff)s
+        ORDER BY last_sync_time
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ), timer AS (
+        DELETE FROM active_timers a USING stale
+        WHERE a.user_id = stale.user_id
+        RETURNING a.task_id,
+                  GREATEST(FLOOR(EXTRACT(EPOCH FROM (a.last_sync_time - a.started_at)) * 1000), 0)::bigint AS elapsed_ms
+    ), paused AS (
+        UPDATE user_tasks t
+        SET status = CASE WHEN t.status = 'in-progress' THEN 'paused' ELSE t.status END,
+            time_spent = t.time_spent + timer.elapsed_ms
+        FROM timer
+        WHERE t.id = timer.task_id
+        RETURNING timer.elapsed_ms
+    )
+    SELECT COUNT(*) AS reclaimed, COALESCE(SUM(elapsed_ms), 0) AS credited_ms FROM paused
+"""
+
+timer_reaper_stats = {
+    'runs': 0,
+    'reclaimed_total': 0,
+    'credited_ms_total': 0,
+    'last_run': None,
+    'last_reclaimed': 0,
+    'last_duration_ms': 0,
+}
+_timer_reaper_lock = threading.Lock()
+_timer_reaper_pid = None
+
+def reap_stale_timers(stale_after=None, batch_size=None):
+    """
+    Pause every timer whose last heartbeat is older than stale_after seconds,
+    batch_size timers per transaction. Returns the run's metrics.
+    Needs an application context.
+    """
+    stale_after = TIMER_STALE_AFTER_SECONDS if stale_after is None else stale_after
+    batch_size = TIMER_REAPER_BATCH_SIZE if batch_size is None else batch_size
+    started = time.monotonic()
+    cutoff = datetime.now() - timedelta(seconds=stale_after)
+    reclaimed = credited_ms = batches = 0
+    
+    while True:
+        result = execute_query(
+            REAP_STALE_TIMERS_SQL,
+            {'cutoff': cutoff, 'batch_size': batch_size},
+            fetch_one=True, commit=True
+        )
+        batches += 1
+        reclaimed += result['reclaimed']
+        credited_ms += int(result['credited_ms'])
+        if result['reclaimed'] < batch_size:
+            break
+    
+    duration_ms = int((time.monotonic() - started) * 1000)
+    with _timer_reaper_lock:
+        timer_reaper_stats['runs'] += 1
+        timer_reaper_stats['reclaimed_total'] += reclaimed
+        timer_reaper_stats['credited_ms_total'] += credited_ms
+        timer_reaper_stats['last_run'] = datetime.now().isoformat()
+        timer_reaper_stats['last_reclaimed'] = reclaimed
+        timer_reaper_stats['last_duration_ms'] = duration_ms
+    if reclaimed:
+        current_app.logger.info(f"Timer reaper paused {reclaimed} stale timer(s), credited {credited_ms} ms in {duration_ms} ms")
+    
+    return {'reclaimed': reclaimed, 'credited_ms': credited_ms, 'batches': batches, 'duration_ms': duration_ms}
+
+def _timer_reaper_loop(app):
+    while True:
+        # Jitter keeps the workers' runs apart
+        time.sleep(TIMER_REAPER_INTERVAL * random.uniform(0.8, 1.2))
+        try:
+            with app.app_context():
+                reap_stale_timers()
+        except psycopg2.Error as e:
+            app.logger.warning(f"Timer reaper run failed: {type(e).__name__}")
+
+@bp.before_app_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+    g.query_seconds = 0.0
+
+@bp.after_app_request
+def record_request_metrics(response):
+    if 'request_started' in g:
+        endpoint = request.endpoint or 'unmatched'
+        labels = (('endpoint', endpoint), ('method', request.method))
+        metrics.observe('focusflow_http_request_duration_seconds', labels, time.perf_counter() - g.request_started)
+        metrics.inc('focusflow_http_requests_total', labels + (('status', str(response.status_code)),))
+        metrics.inc('focusflow_http_request_queries_total', (('endpoint', endpoint),), g.query_count)
+        metrics.inc('focusflow_http_request_query_seconds_total', (('endpoint', endpoint),), g.query_seconds)
+        metrics.flush()
+    return response
+
+# --- Request Profiling ---
+PROFILE_FILE_PATTERN = re.compile(r'^\d{8}T\d{6}\.\d{6}_(?P<endpoint>[\w.]+)_(?P<duration>\d+)ms_\d+_\w+\.prof$')
+
+class RequestProfiler:
+    """
+    Runs cProfile on a sample of requests and writes one .prof file per request
+    to directory, named <time>_<endpoint>_<duration>ms_<pid>_<id>.prof. Only
+    the newest max_files profiles are kept. One request per worker is profiled
+    at a time; others are skipped rather than queued.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, endpoints=None, token=None, max_files=200):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.endpoints = endpoints  # None = every endpoint
+        self.token = token
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    def wanted(self):
+        """Whether to profile the current request"""
+        if self.token and secrets.compare_digest(request.headers.get('X-Profile', ''), self.token):
+            return True
+        if self.sample_rate <= 0 or (self.endpoints and request.endpoint not in self.endpoints):
+            return False
+        return random.random() < self.sample_rate
+
+    def start(self):
+        if not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def finish(self, profiler, endpoint, duration):
+        try:
+            profiler.disable()
+            os.makedirs(self.directory, exist_ok=True)
+            filename = (f"{datetime.now().strftime('%Y%m%dT%H%M%S.%f')}_{endpoint}_{int(duration * 1000)}ms_"
+                        f"{os.getpid()}_{secrets.token_hex(3)}.prof")
+            profiler.dump_stats(os.path.join(self.directory, filename))
+            self._rotate()
+        finally:
+            self._busy.release()
+
+    def _rotate(self):
+        profiles = sorted(f for f in os.listdir(self.directory) if f.endswith('.prof'))
+        for filename in profiles[:max(len(profiles) - self.max_files, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass  # Another worker removed it first
+
+request_profiler = RequestProfiler(
+    directory=os.environ.get('PROFILE_DIR', 'profiles'),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    endpoints={e.strip() for e in os.environ.get('PROFILE_ENDPOINTS', '').split(',') if e.strip()} or None,
+    token=os.environ.get('PROFILE_TOKEN') or None,
+    max_files=int(os.environ.get('PROFILE_MAX_FILES', '200')),
+)
+
+@bp.before_app_request
+def start_request_profile():
+    if request_profiler.wanted():
+        g.profiler = request_profiler.start()
+
+@bp.teardown_app_request
+def finish_request_profile(exception):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        duration = time.perf_counter() - g.get('request_started', time.perf_counter())
+        try:
+            request_profiler.finish(profiler, request.endpoint or 'unmatched', duration)
+        except OSError as e:
+            current_app.logger.warning(f"Could not write request profile: {type(e).__name__}")
+
+@bp.cli.command('profile-report')
+@click.option('--dir', 'directory', default=None, help='Profile directory (default: PROFILE_DIR)')
+@click.option('--endpoint', default=None, help='Only profiles of this endpoint, e.g. main.get_analytics')
+@click.option('--min-ms', type=int, default=0, help='Only requests that took at least this long')
+@click.option('--top', type=int, default=25, help='Number of functions to list')
+@click.option('--sort', type=click.Choice(['cumulative', 'tottime', 'ncalls']), default='cumulative')
+def profile_report_command(directory, endpoint, min_ms, top, sort):
+    """Aggregate saved request profiles into a hot-function report"""
+    directory = directory or request_profiler.directory
+    selected = {}
+    for filename in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        match = PROFILE_FILE_PATTERN.match(filename)
+        if not match or (endpoint and match.group('endpoint') != endpoint):
+            continue
+        if int(match.group('duration')) >= min_ms:
+            selected.setdefault(match.group('endpoint'), []).append((filename, int(match.group('duration'))))
+    if not selected:
+        print(f"No matching profiles in {directory}.")
+        return
+    
+    print(f"{'Endpoint':<40} {'Profiles':>8} {'p50 ms':>8} {'max ms':>8}")
+    for name, profiles in sorted(selected.items()):
+        durations = sorted(duration for _, duration in profiles)
+        print(f"{name:<40} {len(durations):>8} {durations[len(durations) // 2]:>8} {durations[-1]:>8}")
+    print()
+    
+    paths = [os.path.join(directory, filename) for profiles in selected.values() for filename, _ in profiles]
+    stats = pstats.Stats(paths[0])
+    for path in paths[1:]:
+        stats.add(path)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+@bp.before_app_request
+def start_timer_reaper():
+    """Start the in-process reaper once per worker when TIMER_REAPER_INTERVAL is set"""
+    global _timer_reaper_pid
+    if TIMER_REAPER_INTERVAL <= 0 or _timer_reaper_pid == os.getpid():
+        return
+    with _timer_reaper_lock:
+        if _timer_reaper_pid != os.getpid():
+            # Threads do not survive fork; each worker starts its own
+            _timer_reaper_pid = os.getpid()
+            threading.Thread(target=_timer_reaper_loop, args=(current_app._get_current_object(),),
+                             name='timer-reaper', daemon=True).start()
+
+@bp.cli.command('reap-timers')
+@click.option('--stale-after', type=int, default=None,
+              help=f'Seconds without a heartbeat before a timer is abandoned (default: {TIMER_STALE_AFTER_SECONDS})')
+@click.option('--batch-size', type=int, default=None,
+              help=f'Timers paused per transaction (default: {TIMER_REAPER_BATCH_SIZE})')
+def reap_timers_command(stale_after, batch_size):
+    """Pause timers abandoned by crashed or closed tabs"""
+    result = reap_stale_timers(stale_after, batch_size)
+    print(f"Paused {result['reclaimed']} stale timer(s), credited {result['credited_ms']} ms "
+          f"in {result['batches']} batch(es), {result['duration_ms']} ms.")
+
+# --- Data Export ---
+# Columns exported per dataset; rows are streamed in this order
+EXPORT_DATASETS = {
+    'tasks': ('user_tasks',
+              ['id', 'entry_date', 'title', 'description', 'start_time', 'duration_minutes',
+               'status', 'time_spent', 'created_at'],
+              'entry_date, id'),
+    'notes': ('user_notes',
+              ['id', 'entry_date', 'title', 'content', 'note_type', 'created_at', 'updated_at'],
+              'entry_date, id'),
+    'daily_entries': ('daily_entries', ['entry_date', 'notes'], 'entry_date'),
+    'activity_log': ('activity_log', ['id', 'timestamp', 'message', 'task_db_id'], 'timestamp, id'),
+}
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+# Rows fetched per round trip by the server-side cursors
+EXPORT_FETCH_SIZE = 2000
+# Bytes of output gathered before it is compressed and sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def export_json_default(value):
+    # Dates, times and timestamps as ISO 8601
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def iter_export_rows(db, dataset, user_id):
+    """Yield the user's rows of dataset from a named (server-side) cursor, EXPORT_FETCH_SIZE at a time"""
+    table, columns, order_by = EXPORT_DATASETS[dataset]
+    cursor = db.cursor(name=f'export_{dataset}')
+    cursor.itersize = EXPORT_FETCH_SIZE
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE user_id = %s ORDER BY {order_by}",
+            (user_id,)
+        )
+        yield from cursor
+    finally:
+        cursor.close()
+
+def iter_export(db, datasets, fmt, user_id):
+    """Render datasets as text chunks in the requested format"""
+    if fmt == 'csv':
+        # Single dataset only (checked by the endpoint)
+        columns = EXPORT_DATASETS[datasets[0]][1]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in iter_export_rows(db, datasets[0], user_id):
+            # csv writes None as an empty field; dates and times go out as ISO 8601
+            writer.writerow([value.isoformat() if isinstance(value, (date, dt_time)) else value for value in row])
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+    
+    if fmt == 'json':
+        yield '{'
+    for index, dataset in enumerate(datasets):
+        columns = EXPORT_DATASETS[dataset][1]
+        if fmt == 'json':
+            yield f'{"," if index else ""}{json.dumps(dataset)}:['
+        first = True
+        for row in iter_export_rows(db, dataset, user_id):
+            record = dict(zip(columns, row))
+            if fmt == 'ndjson':
+                record = {'type': dataset, **record}
+                yield json.dumps(record, default=export_json_default) + '\n'
+            else:
+                yield ('' if first else ',') + json.dumps(record, default=export_json_default)
+            first = False
+        if fmt == 'json':
+            yield ']'
+    if fmt == 'json':
+        yield '}'
+
+def encode_export(chunks, compress):
+    """Batch text chunks into EXPORT_CHUNK_SIZE pieces, gzip-compressing them as they are sent"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip container
+    pending, pending_size = [], 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= EXPORT_CHUNK_SIZE:
+            data = ''.join(pending).encode('utf-8')
+            pending, pending_size = [], 0
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+    data = ''.join(pending).encode('utf-8')
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+@bp.route('/api/export', methods=['GET'])
+@bp.route('/api/export/<dataset>', methods=['GET'])
+@login_required
+@limiter.limit("10 per hour")
+def export_data(dataset=None):
+    """
+    Stream the user's full history. /api/export returns every dataset as JSON or
+    NDJSON; /api/export/<dataset> returns one dataset, also as CSV.
+    """
+    fmt = request.args.get('format', 'csv' if dataset else 'json').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    if dataset is None:
+        if fmt == 'csv':
+            return jsonify({"error": "CSV exports one dataset at a time: /api/export/<dataset>?format=csv"}), 400
+        datasets = list(EXPORT_DATASETS)
+    elif dataset in EXPORT_DATASETS:
+        datasets = [dataset]
+    else:
+        return jsonify({"error": f"Unknown dataset. Available: {', '.join(EXPORT_DATASETS)}"}), 404
+    
+    user_id = current_user.id
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    
+    @stream_with_context
+    def generate():
+        db = get_db()
+        # One snapshot for every dataset; the request's connection is held until the
+        # stream ends and is rolled back when it goes back to the pool
+        db.rollback()
+        cursor = db.cursor()
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        cursor.close()
+        yield from encode_export(iter_export(db, datasets, fmt, user_id), compress)
+    
+    filename = f"focusflow-{dataset or 'export'}-{datetime.now().strftime('%Y%m%d')}.{fmt}"
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Cache-Control': 'no-store',
+        'Vary': 'Accept-Encoding',
+        'X-Accel-Buffering': 'no'
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    return Response(generate(), mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
+# --- Task Import ---
+TASK_IMPORT_BATCH_SIZE = 500  # Rows per multi-row INSERT
+TASK_IMPORT_MAX_ROWS = 10000  # Per upload; the CLI has no limit
+TASK_IMPORT_MAX_BYTES = 5 * 1024 * 1024
+TASK_IMPORT_MAX_ERRORS = 100  # Row errors listed in the report
+TASK_IMPORT_STATUSES = {'pending', 'completed', 'paused'}
+
+def parse_task_csv(lines):
+    """
+    Yield (line_number, fields) for each data row of a CSV with a header row.
+    Accepts the columns of /api/export/tasks; `date` is an alias of entry_date.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        fields = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items() if key}
+        if 'entry_date' not in fields and 'date' in fields:
+            fields['entry_date'] = fields['date']
+        yield reader.line_num, fields
+
+def parse_ics_datetime(value, params):
+    """Parse a DTSTART/DTEND value into (date, time or None); UTC times become local"""
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value[:8], '%Y%m%d').date(), None
+    parsed = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        parsed = parsed.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return parsed.date(), parsed.time()
+
+ICS_ESCAPE_PATTERN = re.compile(r'\\([\\;,nN])')
+ICS_DURATION_PATTERN = re.compile(r'^P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+def parse_task_ics(lines):
+    """
+    Yield (line_number, fields) for each VEVENT of an iCalendar file, reading it
+    line by line. Recurring events import their first occurrence only.
+    """
+    def unfolded():
+        # RFC 5545 folds long lines; continuation lines start with a space or tab
+        buffered, buffered_line = None, 0
+        for line_number, line in enumerate(lines, 1):
+            line = line.rstrip('\r\n')
+            if line[:1] in (' ', '\t') and buffered is not None:
+                buffered += line[1:]
+                continue
+            if buffered is not None:
+                yield buffered_line, buffered
+            buffered, buffered_line = line, line_number
+        if buffered is not None:
+            yield buffered_line, buffered
+    
+    event, event_line = None, 0
+    for line_number, line in unfolded():
+        name_part, _, value = line.partition(':')
+        name, *param_parts = name_part.split(';')
+        name = name.upper()
+        params = dict(part.split('=', 1) for part in param_parts if '=' in part)
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event, event_line = {}, line_number
+        elif name == 'END' and value.upper() == 'VEVENT' and event is not None:
+            yield event_line, event
+            event = None
+        elif event is not None:
+            text = ICS_ESCAPE_PATTERN.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+            if name == 'SUMMARY':
+                event['title'] = text.strip()
+            elif name == 'DESCRIPTION':
+                event['description'] = text.strip()
+            elif name in ('DTSTART', 'DTEND'):
+                try:
+                    event[name] = parse_ics_datetime(value.strip(), params)
+                except ValueError:
+                    event['error'] = f"Invalid {name}: {value.strip()}"
+            elif name == 'DURATION':
+                event['DURATION'] = value.strip()
+            elif name == 'STATUS' and value.strip().upper() == 'CANCELLED':
+                event['error'] = 'Cancelled event'
+    
+    if event is not None:
+        yield event_line, {'error': 'Unterminated VEVENT'}
+
+def ics_event_to_fields(event):
+    """Map a parsed VEVENT onto the CSV column names"""
+    if 'error' in event:
+        return event
+    if 'DTSTART' not in event:
+        return {'error': 'Missing DTSTART'}
+    start_date, start = event['DTSTART']
+    fields = {
+        'entry_date': start_date.isoformat(),
+        'title': event.get('title', ''),
+        'description': event.get('description', ''),
+        'start_time': start.strftime('%H:%M') if start else '',
+        'duration_minutes': '',
+    }
+    if start and 'DTEND' in event and event['DTEND'][1] is not None:
+        end_date, end = event['DTEND']
+        minutes = int((datetime.combine(end_date, end) - datetime.combine(start_date, start)).total_seconds() // 60)
+        fields['duration_minutes'] = str(minutes)
+    elif 'DURATION' in event:
+        match = ICS_DURATION_PATTERN.match(event['DURATION'])
+        if match:
+            weeks, days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+            fields['duration_minutes'] = str(((weeks * 7 + days) * 24 + hours) * 60 + minutes + seconds // 60)
+    return fields
+
+def validate_import_task(fields):
+    """Return (row values, None) for a valid task or (None, error message)"""
+    if 'error' in fields:
+        return None, fields['error']
+    try:
+        entry_date = datetime.strptime(fields.get('entry_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return None, "entry_date must be YYYY-MM-DD"
+    
+    title = fields.get('title', '')
+    if not title:
+        return None, "title is required"
+    if len(title) > 255:
+        return None, "title is longer than 255 characters"
+    description = fields.get('description', '')
+    if len(description) > 10000:
+        return None, "description is longer than 10000 characters"
+    
+    start_time = None
+    if fields.get('start_time'):
+        for time_format in ('%H:%M', '%H:%M:%S'):
+            try:
+                start_time = datetime.strptime(fields['start_time'], time_format).time()
+                break
+            except ValueError:
+                continue
+        else:
+            return None, "start_time must be HH:MM"
+    
+    duration_minutes = None
+    if fields.get('duration_minutes'):
+        try:
+            duration_minutes = int(fields['duration_minutes'])
+        except ValueError:
+            return None, "duration_minutes must be a whole number"
+        if not 0 < duration_minutes <= 1440:
+            return None, "duration_minutes must be between 1 and 1440"
+    
+    # Imported tasks never come in running; in-progress ones are imported paused
+    status = (fields.get('status') or 'pending').lower()
+    if status == 'in-progress':
+        status = 'paused'
+    if status not in TASK_IMPORT_STATUSES:
+        return None, f"status must be one of: {', '.join(sorted(TASK_IMPORT_STATUSES))}"
+    
+    try:
+        time_spent = int(fields.get('time_spent') or 0)
+    except ValueError:
+        return None, "time_spent must be a whole number of milliseconds"
+    if time_spent < 0:
+        return None, "time_spent cannot be negative"
+    
+    return (entry_date, title, description, start_time, duration_minutes, status, time_spent), None
+
+def import_tasks(user_id, lines, fmt, max_rows=None, dry_run=False):
+    """
+    Validate and insert tasks from an iterable of text lines (CSV or iCalendar),
+    TASK_IMPORT_BATCH_SIZE rows per INSERT, in a single transaction.
+    Returns the import report; invalid rows are skipped and listed in it.
+    """
+    rows = parse_task_csv(lines) if fmt == 'csv' else (
+        (line_number, ics_event_to_fields(event)) for line_number, event in parse_task_ics(lines))
+    report = {'imported': 0, 'skipped': 0, 'errors': [], 'truncated': False}
+    db = get_db()
+    cursor = db.cursor()
+    batch = []
+    
+    def flush():
+        if batch and not dry_run:
+            psycopg2.extras.execute_values(
+                cursor,
+                """INSERT INTO user_tasks (user_id, entry_date, title, description, start_time,
+                                           duration_minutes, status, time_spent)
+                   VALUES %s""",
+                [(user_id,) + row for row in batch],
+                page_size=TASK_IMPORT_BATCH_SIZE
+            )
+        report['imported'] += len(batch)
+        batch.clear()
+    
+    try:
+        for line_number, fields in rows:
+            if max_rows is not None and report['imported'] + len(batch) >= max_rows:
+                report['truncated'] = True
+                break
+            values, error = validate_import_task(fields)
+            if error:
+                report['skipped'] += 1
+                if len(report['errors']) < TASK_IMPORT_MAX_ERRORS:
+                    report['errors'].append({'line': line_number, 'error': error})
+                continue
+            batch.append(values)
+            if len(batch) >= TASK_IMPORT_BATCH_SIZE:
+                flush()
+        flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+    return report
+
+def task_import_format(filename, requested=None):
+    """'csv' or 'ics' from ?format= or the file extension, else None"""
+    fmt = (requested or os.path.splitext(filename or '')[1].lstrip('.')).lower()
+    return {'csv': 'csv', 'ics': 'ics', 'ical': 'ics'}.get(fmt)
+
+@bp.route('/api/user-tasks/import', methods=['POST'])
+@login_required
+@limiter.limit("10 per hour")
+def import_user_tasks():
+    """Bulk-create tasks from an uploaded CSV or iCalendar (.ics) file"""
+    if request.content_length and request.content_length > TASK_IMPORT_MAX_BYTES:
+        return jsonify({"error": f"File too large (max {TASK_IMPORT_MAX_BYTES // (1024 * 1024)} MB)"}), 413
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"error": "Upload the file as multipart form field 'file'"}), 400
+    fmt = task_import_format(upload.filename, request.args.get('format'))
+    if fmt is None:
+        return jsonify({"error": "Unsupported file type; use .csv or .ics"}), 400
+    
+    # Parse the upload as it is read instead of loading it whole
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        report = import_tasks(current_user.id, lines, fmt, max_rows=TASK_IMPORT_MAX_ROWS,
+                              dry_run=request.args.get('dry_run') in ('1', 'true'))
+    except csv.Error as e:
+        return jsonify({"error": f"Could not parse CSV: {e}"}), 400
+    except psycopg2.Error as e:
+        handle_database_error(e, "task import")
+        return safe_error_response("Failed to import tasks")
+    
+    return jsonify({'status': 'success', **report})
+
+@bp.cli.command('import-tasks')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-id', type=int, required=True, help='Owner of the imported tasks')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ics']), default=None,
+              help='File format (default: from the file extension)')
+@click.option('--dry-run', is_flag=True, help='Validate the file without inserting anything')
+def import_tasks_command(path, user_id, fmt, dry_run):
+    """Bulk-import tasks for a user from a CSV or iCalendar file"""
+    fmt = task_import_format(path, fmt)
+    if fmt is None:
+        print("Unsupported file type; use .csv or .ics or pass --format.")
+        sys.exit(1)
+    with open(path, encoding='utf-8-sig', errors='replace', newline='') as f:
+        report = import_tasks(user_id, f, fmt, dry_run=dry_run)
+    for error in report['errors']:
+        print(f"line {error['line']}: {error['error']}")
+    action = 'Validated' if dry_run else 'Imported'
+    print(f"{action} {report['imported']} task(s), skipped {report['skipped']} invalid row(s).")
+
+# --- Synthetic Data (scale testing) ---
+SEED_USERNAME_PREFIX = 'seed_user_'
+SEED_PASSWORD = 'Seed-password-1'
+SEED_TITLE_VERBS = ('Review', 'Write', 'Plan', 'Study', 'Refactor', 'Read', 'Draft', 'Prepare', 'Fix', 'Outline')
+SEED_TITLE_NOUNS = ('chapter 3', 'lecture notes', 'project proposal', 'weekly report', 'flashcards',
+                    'problem set', 'pull request', 'budget', 'presentation', 'research paper')
+SEED_NOTE_TYPES = (('general', 5), ('reflection', 2), ('idea', 2), ('reminder', 1))
+SEED_DURATIONS = ((15, 2), (25, 5), (30, 4), (45, 3), (60, 3), (90, 1))
+
+def copy_value(value):
+    """Render a value for COPY ... FROM STDIN text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+class SeedWriter:
+    """
+    Writes synthetic rows to one COPY staging file per table. Activity level,
+    weekend habits and completion rates vary per user, so a few heavy users
+    dominate as they do in production.
+    """
+    TABLES = (
+        ('users', 'id, username, email, password_hash, created_at'),
+        ('user_tasks', 'id, user_id, entry_date, title, description, start_time, duration_minutes, status, time_spent, created_at'),
+        ('user_notes', 'user_id, entry_date, title, content, note_type, created_at, updated_at'),
+        ('daily_entries', 'user_id, entry_date, notes'),
+        ('activity_log', 'user_id, message, timestamp, task_db_id'),
+    )
+
+    def __init__(self, password_hash, tasks_per_day, next_task_id):
+        self.password_hash = password_hash
+        self.tasks_per_day = tasks_per_day
+        self.next_task_id = next_task_id
+        self.files = {table: tempfile.TemporaryFile(mode='w+', encoding='utf-8') for table, _ in self.TABLES}
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def write_user(self, rng, user_id, index, start_date, end_date):
+        """Write one user's history; returns the number of tasks written"""
+        users, tasks, notes, daily_entries, activity = (self.files[table] for table, _ in self.TABLES)
+        joined = datetime.combine(start_date, dt_time(9)) - timedelta(days=rng.randint(0, 30))
+        username = f'{SEED_USERNAME_PREFIX}{index}'
+        users.write(f"{user_id}\t{username}\t{username}@example.com\t{self.password_hash}\t{joined.isoformat()}\n")
+        
+        tasks_per_day = rng.lognormvariate(math.log(self.tasks_per_day), 0.6)
+        weekend_factor = rng.choice((0.0, 0.3, 0.6, 1.0))
+        skip_rate = rng.uniform(0.05, 0.4)
+        completion_rate = rng.betavariate(6, 3)
+        durations, duration_weights = zip(*SEED_DURATIONS)
+        note_types, note_weights = zip(*SEED_NOTE_TYPES)
+        task_id = self.next_task_id
+        
+        day = start_date
+        while day <= end_date:
+            weekend = day.weekday() >= 5
+            if rng.random() < skip_rate or (weekend and rng.random() > weekend_factor):
+                day += timedelta(days=1)
+                continue
+            count = max(0, int(rng.gauss(tasks_per_day, tasks_per_day / 2) + 0.5))
+            clock = datetime.combine(day, dt_time(rng.randint(7, 10), rng.choice((0, 15, 30, 45))))
+            for _ in range(count):
+                title = f"{rng.choice(SEED_TITLE_VERBS)} {rng.choice(SEED_TITLE_NOUNS)}"
+                duration = rng.choices(durations, duration_weights)[0]
+                roll = rng.random()
+                if day == end_date:
+                    status = 'pending' if roll < 0.6 else 'completed'
+                elif roll < completion_rate:
+                    status = 'completed'
+                else:
+                    status = 'paused' if roll < completion_rate + (1 - completion_rate) / 2 else 'pending'
+                if status == 'completed':
+                    time_spent = int(duration * 60000 * rng.lognormvariate(0, 0.35))
+                elif status == 'paused':
+                    time_spent = int(duration * 60000 * rng.uniform(0.05, 0.9))
+                else:
+                    time_spent = 0
+                created_at = clock - timedelta(minutes=rng.randint(5, 600))
+                tasks.write(f"{task_id}\t{user_id}\t{day.isoformat()}\t{title}\t\\N\t{clock.time().isoformat()}\t"
+                            f"{duration}\t{status}\t{time_spent}\t{created_at.isoformat()}\n")
+            
+                activity.write(f"{user_id}\tAdded task: {title}\t{created_at.isoformat()}\t\\N\n")
+                if time_spent:
+                    # Work happens in sessions separated by pauses
+                    moment = clock
+                    sessions = 1 + min(int(rng.expovariate(0.8)), 6)
+                    for session_index in range(sessions):
+                        activity.write(f"{user_id}\tStarted working on: {title}\t{moment.isoformat()}\t{task_id}\n")
+                        moment += timedelta(milliseconds=time_spent // sessions)
+                        if session_index < sessions - 1 or status == 'paused':
+                            activity.write(f"{user_id}\tPaused task: {title}\t{moment.isoformat()}\t{task_id}\n")
+                            moment += timedelta(minutes=rng.randint(2, 40))
+                    if status == 'completed':
+                        activity.write(f"{user_id}\tCompleted task: {title}\t{moment.isoformat()}\t{task_id}\n")
+                clock += timedelta(minutes=duration + rng.randint(0, 45))
+                task_id += 1
+        
+            if rng.random() < 0.3:
+                written = datetime.combine(day, dt_time(rng.randint(18, 23), rng.randint(0, 59)))
+                note_type = rng.choices(note_types, note_weights)[0]
+                notes.write(f"{user_id}\t{day.isoformat()}\t{note_type.title()} for {day.isoformat()}\t"
+                            f"{copy_value(rng.choice(SEED_TITLE_NOUNS) + chr(10) + 'Synthetic note.')}\t{note_type}\t"
+                            f"{written.isoformat()}\t{written.isoformat()}\n")
+            if rng.random() < 0.5:
+                daily_entries.write(f"{user_id}\t{day.isoformat()}\tFocused on {rng.choice(SEED_TITLE_NOUNS)}.\n")
+            day += timedelta(days=1)
+        
+        written_tasks = task_id - self.next_task_id
+        self.next_task_id = task_id
+        return written_tasks
+
+def reserve_ids(cursor, table):
+    """First free id of a SERIAL column; the caller holds a lock that blocks inserts"""
+    cursor.execute(f"SELECT GREATEST(nextval(pg_get_serial_sequence('{table}', 'id')), "
+                   f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}))")
+    return cursor.fetchone()[0]
+
+def seed_database(users, days, tasks_per_day, seed, end_date, log=print):
+    """
+    Bulk-load deterministic synthetic users and history with COPY.
+    The same seed, counts and end_date always produce the same rows. Row
+    triggers are disabled during the load and the rollups rebuilt afterwards.
+    Needs an application context; returns {table: rows}.
+    """
+    start_date = end_date - timedelta(days=days - 1)
+    password_hash = generate_password_hash(SEED_PASSWORD, method=password_hasher.method)
+    db = get_db()
+    cursor = db.cursor()
+    writer = None
+    counts = {}
+    try:
+        tables = ', '.join(table for table, _ in SeedWriter.TABLES)
+        cursor.execute(f"LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE")
+        cursor.execute("SELECT 1 FROM users WHERE username LIKE %s LIMIT 1", (SEED_USERNAME_PREFIX + '%',))
+        if cursor.fetchone():
+            raise ValueError("Seed users already exist; rerun with --reset to replace them.")
+        first_user_id = reserve_ids(cursor, 'users')
+        writer = SeedWriter(password_hash, tasks_per_day, reserve_ids(cursor, 'user_tasks'))
+        
+        started = time.monotonic()
+        for index in range(users):
+            # A generator per user keeps each user's history stable when --users changes
+            writer.write_user(random.Random(f'{seed}:{index}'), first_user_id + index, index, start_date, end_date)
+        log(f"Generated {users} users' history in {time.monotonic() - started:.1f}s")
+        
+        for table, _ in SeedWriter.TABLES:
+            cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+        for table, columns in SeedWriter.TABLES:
+            f = writer.files[table]
+            f.seek(0)
+            started = time.monotonic()
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", f, size=1 << 20)
+            counts[table] = cursor.rowcount
+            elapsed = max(time.monotonic() - started, 0.001)
+            log(f"  {table:<14} {counts[table]:>10} rows in {elapsed:6.1f}s ({counts[table] / elapsed * 60:,.0f} rows/min)")
+        for table, _ in SeedWriter.TABLES:
+            cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        
+        cursor.execute("SELECT setval(pg_get_serial_sequence('users', 'id'), %s)", (first_user_id + users - 1,))
+        if counts['user_tasks']:
+            cursor.execute("SELECT setval(pg_get_serial_sequence('user_tasks', 'id'), %s)", (writer.next_task_id - 1,))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        if writer is not None:
+            writer.close()
+    
+    started = time.monotonic()
+    rebuild_user_stats()
+    db.autocommit = True
+    try:
+        cursor = db.cursor()
+        cursor.execute(f"ANALYZE {tables}")
+        cursor.close()
+    finally:
+        db.autocommit = False
+    log(f"Rebuilt rollups and statistics in {time.monotonic() - started:.1f}s")
+    return counts
+
+def delete_seed_users():
+    return execute_query("DELETE FROM users WHERE username LIKE %s", (SEED_USERNAME_PREFIX + '%',))
+
+@bp.cli.command('seed')
+@click.option('--users', type=int, default=100, help='Synthetic users to create')
+@click.option('--days', type=int, default=730, help='Days of history per user')
+@click.option('--tasks-per-day', type=float, default=4.0, help='Median tasks on an active day')
+@click.option('--seed', 'seed_value', type=int, default=42, help='Random seed; the same seed gives the same data')
+@click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Last day of history (default: today); fix it for byte-identical datasets')
+@click.option('--reset', is_flag=True, help='Delete previously seeded users first')
+def seed_command(users, days, tasks_per_day, seed_value, end_date, reset):
+    """Bulk-generate synthetic users and history for scale testing"""
+    if reset:
+        print(f"Deleted {delete_seed_users()} seeded user(s) and their data.")
+    end_date = end_date.date() if end_date else date.today()
+    started = time.monotonic()
+    try:
+        counts = seed_database(users, days, tasks_per_day, seed_value, end_date)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    elapsed = time.monotonic() - started
+    total = sum(counts.values())
+    print(f"Seeded {total:,} rows in {elapsed:.1f}s ({total / elapsed * 60:,.0f} rows/min). "
+          f"Log in as {SEED_USERNAME_PREFIX}0 / {SEED_PASSWORD}.")
+
+# --- Live Updates (Server-Sent Events) ---
+class EventBroker:
+    """
+    Fans out PostgreSQL NOTIFY events to the SSE streams of this worker.
+    One background thread per process LISTENs on a dedicated connection and
+    hands each event to the queues of the streams belonging to its user.
+    """
+
+    def __init__(self, dsn_config, channel, max_streams=16, max_streams_per_user=5):
+        self.dsn_config = dsn_config
+        self.channel = channel
+        self.max_streams = max_streams
+        self.max_streams_per_user = max_streams_per_user
+        self._subscribers = {}  # user_id -> set of queues
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def stream_count(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, user_id):
+        """Register a stream for user_id; returns its queue, or None when at capacity"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Listener threads do not survive fork; start one per worker
+                self._subscribers = {}
+                self._thread = None
+                self._pid = os.getpid()
+            total = sum(len(queues) for queues in self._subscribers.values())
+            if total >= self.max_streams or len(self._subscribers.get(user_id, ())) >= self.max_streams_per_user:
+                return None
+            event_queue = queue.Queue(maxsize=100)
+            self._subscribers.setdefault(user_id, set()).add(event_queue)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, args=(current_app.logger,),
+                                                name='event-broker', daemon=True)
+                self._thread.start()
+        return event_queue
+
+    def unsubscribe(self, user_id, event_queue):
+        with self._lock:
+            user_queues = self._subscribers.get(user_id)
+            if user_queues is not None:
+                user_queues.discard(event_queue)
+                if not user_queues:
+                    del self._subscribers[user_id]
+
+    def _dispatch(self, user_id, event):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for event_queue in targets:
+            try:
+                event_queue.put_nowait(event)
+            except queue.Full:
+                pass  # A stalled client resyncs when it reconnects
+
+    def _broadcast_resync(self):
+        # Events may have been missed while the listener was disconnected
+        with self._lock:
+            user_ids = list(self._subscribers)
+        for user_id in user_ids:
+            self._dispatch(user_id, {'type': 'resync'})
+
+    def _listen(self, logger):
+        backoff = 1
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.dsn_config)
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f'LISTEN {self.channel}')
+                cursor.close()
+                if backoff > 1:
+                    self._broadcast_resync()
+                backoff = 1
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            event = json.loads(notify.payload)
+                        except ValueError:
+                            continue
+                        user_id = event.pop('user_id', None)
+                        if user_id is not None:
+                            self._dispatch(user_id, event)
+            except (psycopg2.Error, OSError) as e:
+                logger.warning(f"Event listener disconnected: {type(e).__name__}")
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+event_broker = EventBroker(
+    DATABASE_CONFIG,
+    'focusflow_events',
+    max_streams=int(os.environ.get('SSE_MAX_STREAMS', '16')),
+    max_streams_per_user=int(os.environ.get('SSE_MAX_STREAMS_PER_USER', '5')),
+)
+SSE_KEEPALIVE_SECONDS = 25
+# Streams end periodically so EventSource reconnects and worker threads are recycled
+SSE_STREAM_LIFETIME_SECONDS = int(os.environ.get('SSE_STREAM_LIFETIME', '600'))
+
+@bp.route('/api/events', methods=['GET'])
+@login_required
+@limiter.limit("30 per minute")
+def event_stream():
+    """Push timer and task/note changes for the current user as Server-Sent Events"""
+    user_id = current_user.id
+    event_queue = event_broker.subscribe(user_id)
+    if event_queue is None:
+        # Over capacity: the client keeps polling and retries later
+        response = jsonify({"error": "Too many open event streams"})
+        response.headers['Retry-After'] = '60'
+        return response, 503
+    
+    # Hand the request's pooled connection back; the stream must not hold it open
+    close_db(None)
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\nevent: ready\ndata: {}\n\n'
+            deadline = time.monotonic() + SSE_STREAM_LIFETIME_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    event = event_queue.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_broker.unsubscribe(user_id, event_queue)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Disable proxy buffering
+    })
+
 # This part is for running with `python app.py` locally
 # Gunicorn will not use this when deployed on Render.
 # --- Production Security Headers ---
-@app.after_request
+@bp.after_app_request
 def add_security_headers(response):
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'DENY'
@@ -1326,26 +3526,26 @@ def add_security_headers(response):
     return response
 
 # --- Error Handlers ---
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found_error(error):
-    app.logger.warning(f'404 error: {request.url}')
+    current_app.logger.warning(f'404 error: {request.url}')
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
-    app.logger.error(f'500 error: {error}')
-    db = g.pop('db', None)
-    if db is not None:
+    current_app.logger.error(f'500 error: {error}')
+    db = g.get('db')
+    if db is not None and not db.closed:
         db.rollback()
     return render_template('errors/500.html'), 500
 
-@app.errorhandler(429)
+@bp.app_errorhandler(429)
 def ratelimit_handler(e):
-    app.logger.warning(f'Rate limit exceeded: {request.remote_addr}')
+    current_app.logger.warning(f'Rate limit exceeded: {request.remote_addr}')
     return jsonify({'error': 'Rate limit exceeded', 'message': str(e.description)}), 429
 
 # --- Health Check Endpoint ---
-@app.route('/health')
+@bp.route('/health')
 @limiter.exempt
 def health_check():
     try:
@@ -1354,18 +3554,32 @@ def health_check():
         return jsonify({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'db_pool': db_pool.stats(),
+            'timer_reaper': dict(timer_reaper_stats),
+            'user_cache': user_cache.stats()
         }), 200
     except Exception as e:
-        app.logger.error(f'Health check failed: {e}')
+        current_app.logger.error(f'Health check failed: {e}')
         return jsonify({
             'status': 'unhealthy',
             'error': str(e),
             'timestamp': datetime.now().isoformat()
         }), 503
 
+# --- Metrics Endpoint (Prometheus text format) ---
+@bp.route('/metrics')
+@limiter.exempt
+def metrics_endpoint():
+    """Query and request metrics summed over every worker; requires METRICS_TOKEN when set"""
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'
+    ):
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # --- Keep-Alive Endpoint (for uptime monitoring) ---
-@app.route('/ping')
+@bp.route('/ping')
 @limiter.exempt
 def ping():
     """Simple ping endpoint for uptime monitoring services"""
@@ -1377,8 +3591,10 @@ def ping():
 # Note: Rate limiting is applied via decorators on existing routes
 
 if __name__ == '__main__':
-    # PostgreSQL database is initialized automatically via ensure_database_initialized()
-    # No need for local file checks since we're using cloud database
+    # Workers never run DDL; deployments run `flask db upgrade` before starting them.
+    # Local runs apply pending migrations here for convenience.
+    migrate_db()
+    app = create_app()
 
     # Run with different settings for development vs production
     if os.environ.get('FLASK_ENV') == 'production':
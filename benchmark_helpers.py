@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmarks for FocusFlow's Pure-Python Request Helpers
+Times the helpers that run on request paths against synthetic inputs of
+10, 1k and 100k rows, and records peak memory and allocated blocks with
+tracemalloc. Results can be saved as a baseline; --check fails when time per
+row or peak memory grows past --threshold times the baseline.
+
+    python benchmark_helpers.py                      # print results
+    python benchmark_helpers.py --save               # record benchmark_helpers_baseline.json
+    python benchmark_helpers.py --check --threshold 1.3
+
+Baselines are machine-specific; record them on the machine that checks them.
+No database is needed.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, time as dt_time, timedelta
+
+os.environ.setdefault('FLASK_ENV', 'development')
+
+import app as focusflow
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(ROOT, 'benchmark_helpers_baseline.json')
+
+def task_rows(n, rng):
+    start = datetime(2024, 1, 1, 8, 0)
+    rows = []
+    for i in range(n):
+        created = start + timedelta(minutes=37 * i)
+        rows.append({
+            'id': i + 1, 'user_id': 1, 'entry_date': created.date(), 'title': f'Task {i}',
+            'description': 'Synthetic task', 'start_time': dt_time(8 + i % 10, 30),
+            'duration_minutes': 30, 'status': rng.choice(['pending', 'completed', 'paused']),
+            'time_spent': rng.randint(0, 3600000), 'timer_start_time': None,
+            'last_sync_time': created if i % 3 == 0 else None,
+            'created_at': created, 'updated_at': created + timedelta(minutes=5),
+        })
+    return rows
+
+def passwords(n, rng):
+    samples = ['Str0ng!Password', 'weakpassword', 'NoDigits!Here', 'short1!', 'Valid-Pass-123', 'password']
+    return [rng.choice(samples) + str(i % 7) for i in range(n)]
+
+def timer_payloads(n, rng):
+    return [{'task_id': rng.randint(1, 10 ** 6), 'session_id': f'session_{1700000000000 + i}_abc{i % 97}'}
+            for i in range(n)]
+
+def activity_rows(n):
+    start = datetime(2024, 6, 1, 9, 0)
+    return [{'id': n - i, 'timestamp': start - timedelta(seconds=30 * i), 'message': 'Started timer'}
+            for i in range(n + 1)]
+
+def task_csv_lines(n, rng):
+    lines = ['entry_date,title,description,start_time,duration_minutes,status,time_spent\n']
+    day = date(2023, 1, 1)
+    for i in range(n):
+        lines.append(f"{(day + timedelta(days=i % 700)).isoformat()},Task {i},Imported,"
+                     f"{8 + i % 10:02d}:00,{rng.choice([15, 30, 60])},{rng.choice(['pending', 'completed'])},"
+                     f"{rng.randint(0, 3600000)}\n")
+    return lines
+
+def task_ics_lines(n):
+    lines = ['BEGIN:VCALENDAR\r\n', 'VERSION:2.0\r\n']
+    day = date(2023, 1, 1)
+    for i in range(n):
+        stamp = (day + timedelta(days=i % 700)).strftime('%Y%m%d')
+        lines += ['BEGIN:VEVENT\r\n', f'SUMMARY:Event {i}\\, imported\r\n',
+                  f'DTSTART:{stamp}T090000\r\n', f'DTEND:{stamp}T093000\r\n', 'END:VEVENT\r\n']
+    lines.append('END:VCALENDAR\r\n')
+    return lines
+
+def export_chunks(n):
+    return [json.dumps({'type': 'tasks', 'id': i, 'title': f'Task {i}', 'time_spent': i * 1000}) + '\n'
+            for i in range(n)]
+
+QUERIES = [f'SELECT * FROM user_tasks WHERE id = %s AND user_id = {i}' for i in range(50)]
+
+def run_import_csv(lines):
+    for _, fields in focusflow.parse_task_csv(lines):
+        focusflow.validate_import_task(fields)
+
+def run_import_ics(lines):
+    for _, event in focusflow.parse_task_ics(lines):
+        focusflow.validate_import_task(focusflow.ics_event_to_fields(event))
+
+def run_page_cursors(rows):
+    for row in rows:
+        focusflow.decode_page_cursor(focusflow.encode_page_cursor(row['timestamp'], row['id']))
+
+# name -> (setup(n, rng) -> data, run(data)); setup runs before every timed run
+CASES = {
+    'serialize_task_data': (task_rows, lambda rows: [focusflow.serialize_task_data(row) for row in rows]),
+    'validate_password': (passwords, lambda items: [focusflow.validate_password(p) for p in items]),
+    'validate_timer_request': (
+        timer_payloads,
+        lambda items: [focusflow.validate_timer_request(p, ['task_id', 'session_id']) for p in items],
+    ),
+    'keyset_page': (lambda n, rng: (activity_rows(n), n),
+                    lambda data: focusflow.keyset_page(data[0], data[1], 'timestamp')),
+    'page_cursor_roundtrip': (lambda n, rng: activity_rows(n), run_page_cursors),
+    'compute_etag': (lambda n, rng: list(range(n)),
+                     lambda items: [focusflow.compute_etag('daily-summary', 1, '2024-06-01', i, 3) for i in items]),
+    'statement_name': (lambda n, rng: [QUERIES[i % len(QUERIES)] for i in range(n)],
+                       lambda items: [focusflow.statement_name(q, 'get_daily_summary') for q in items]),
+    'import_csv': (task_csv_lines, run_import_csv),
+    'import_ics': (lambda n, rng: task_ics_lines(n), run_import_ics),
+    'encode_export_gzip': (lambda n, rng: export_chunks(n),
+                           lambda chunks: sum(len(part) for part in focusflow.encode_export(chunks, True))),
+}
+
+def measure(name, n, repeat, seed):
+    setup, run = CASES[name]
+    timings = []
+    for _ in range(repeat):
+        data = setup(n, random.Random(seed))
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            run(data)
+            timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+
+    data = setup(n, random.Random(seed))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        run(data)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    best = min(timings)
+    return {
+        'best_ms': round(best * 1000, 3),
+        'ns_per_row': round(best * 1e9 / n, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'blocks': blocks,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,1000,100000', help='Comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case; the best is kept')
+    parser.add_argument('--only', default=None, help='Comma-separated case names')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', action='store_true', help=f'Write results to {os.path.basename(BASELINE_FILE)}')
+    parser.add_argument('--check', action='store_true', help='Fail on regressions against the baseline')
+    parser.add_argument('--threshold', type=float, default=1.3, help='Allowed growth factor for time and memory')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else list(CASES)
+    unknown = set(names) - set(CASES)
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+    print("⏱️  FocusFlow Helper Micro-Benchmarks")
+    print("=" * 40)
+    print(f"{'case':<24} {'rows':>7} {'best ms':>10} {'ns/row':>10} {'peak KB':>10} {'blocks':>8}")
+    results = {}
+    for name in names:
+        for n in sizes:
+            result = measure(name, n, args.repeat, args.seed)
+            results[f'{name}[{n}]'] = result
+            print(f"{name:<24} {n:>7} {result['best_ms']:>10} {result['ns_per_row']:>10} "
+                  f"{result['peak_kb']:>10} {result['blocks']:>8}")
+
+    failed = False
+    if args.check:
+        if not os.path.exists(BASELINE_FILE):
+            print("\nℹ️  No baseline yet; run with --save first")
+        else:
+            with open(BASELINE_FILE) as f:
+                baseline = json.load(f)['results']
+            regressions = []
+            for key, result in results.items():
+                before = baseline.get(key)
+                if not before:
+                    continue
+                # Runs under 50 µs and peaks under 64 KB are too small to compare reliably
+                if before['best_ms'] >= 0.05 and result['ns_per_row'] > before['ns_per_row'] * args.threshold:
+                    regressions.append(f"{key}: {before['ns_per_row']} -> {result['ns_per_row']} ns/row")
+                if result['peak_kb'] > max(before['peak_kb'] * args.threshold, 64):
+                    regressions.append(f"{key}: peak {before['peak_kb']} -> {result['peak_kb']} KB")
+            print()
+            for regression in regressions:
+                print(f"❌ {regression}")
+            if not regressions:
+                print(f"✅ No regressions beyond {args.threshold}x the baseline")
+            failed = bool(regressions)
+    if args.save:
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                       'results': results}, f, indent=2)
+        print(f"💾 Saved baseline to {os.path.basename(BASELINE_FILE)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
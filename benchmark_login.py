@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Login Throughput Benchmark for FocusFlow
+Measures logins/sec and how much concurrent logins slow down API requests.
+
+Start the server with rate limits off, e.g.:
+    RATELIMIT_ENABLED=False PORT=5001 WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py
+then run:
+    python benchmark_login.py --username bench --password 'Bench-password-1'
+"""
+
+import argparse
+import re
+import statistics
+import threading
+import time
+
+import requests
+
+BASE_URL = "http://127.0.0.1:5001"
+
+CSRF_PATTERN = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+def login(session, username, password):
+    """Log a session in through the login form; returns True on success"""
+    page = session.get(f"{BASE_URL}/login")
+    match = CSRF_PATTERN.search(page.text)
+    if not match:
+        raise RuntimeError("No CSRF token on the login page")
+    response = session.post(
+        f"{BASE_URL}/login",
+        data={'username': username, 'password': password, 'csrf_token': match.group(1)},
+        allow_redirects=False,
+    )
+    return response.status_code == 302 and '/dashboard' in response.headers.get('Location', '')
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def api_worker(session, stop, latencies, errors):
+    """Poll a cheap authenticated endpoint, as timer syncs do"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{BASE_URL}/api/daily-summary")
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors.append(response.status_code)
+        except requests.RequestException as e:
+            errors.append(type(e).__name__)
+
+def login_worker(username, password, stop, counts):
+    while not stop.is_set():
+        try:
+            if login(requests.Session(), username, password):
+                counts['ok'] += 1
+            else:
+                counts['failed'] += 1
+        except (requests.RequestException, RuntimeError):
+            counts['failed'] += 1
+
+def run_phase(name, api_sessions, login_threads, duration, username, password):
+    stop = threading.Event()
+    latencies, errors = [], []
+    counts = {'ok': 0, 'failed': 0}
+    threads = [threading.Thread(target=api_worker, args=(s, stop, latencies, errors)) for s in api_sessions]
+    threads += [threading.Thread(target=login_worker, args=(username, password, stop, counts))
+                for _ in range(login_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"\n📊 {name}")
+    if login_threads:
+        print(f"   Logins: {counts['ok']} ok, {counts['failed']} failed, {counts['ok'] / duration:.1f} logins/sec")
+    if latencies:
+        print(f"   API: {len(latencies)} requests, p50 {statistics.median(latencies):.1f} ms, "
+              f"p95 {percentile(latencies, 95):.1f} ms, p99 {percentile(latencies, 99):.1f} ms, "
+              f"max {max(latencies):.1f} ms")
+    if errors:
+        print(f"   API errors: {len(errors)} (first: {errors[0]})")
+    return latencies
+
+def main():
+    global BASE_URL
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--username', required=True, help='Existing account used for every login')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--api-threads', type=int, default=4)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per phase')
+    args = parser.parse_args()
+    BASE_URL = args.base_url.rstrip('/')
+
+    print("🚀 FocusFlow Login Benchmark")
+    print("=" * 40)
+
+    api_sessions = []
+    for _ in range(args.api_threads):
+        session = requests.Session()
+        if not login(session, args.username, args.password):
+            print("❌ Could not log in; check the credentials and that rate limiting is off")
+            return
+        api_sessions.append(session)
+
+    baseline = run_phase("API only", api_sessions, 0, args.duration, args.username, args.password)
+    loaded = run_phase(f"API with {args.login_threads} concurrent login threads", api_sessions,
+                       args.login_threads, args.duration, args.username, args.password)
+
+    if baseline and loaded:
+        slowdown = percentile(loaded, 95) / max(percentile(baseline, 95), 0.001)
+        print(f"\n⏱️  API p95 under login load: {slowdown:.1f}x the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark for FocusFlow
+Measures how long `import app` and create_app() take in a fresh interpreter,
+then starts gunicorn with gunicorn.conf.py (with and without --preload) and
+times the first successful request. On Linux it also reports how much of
+each worker's memory is shared with the master.
+
+    python benchmark_startup.py --runs 10
+    python benchmark_startup.py --skip-server   # import timings only
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_app_ms': (created - imported) * 1000}))
+"""
+
+def measure_import(runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_PROBE], cwd=ROOT, check=True,
+            capture_output=True, text=True,
+        ).stdout
+        total_ms = (time.perf_counter() - started) * 1000
+        result = json.loads(output.strip().splitlines()[-1])
+        result['process_ms'] = total_ms
+        samples.append(result)
+    return samples
+
+def slowest_imports(limit):
+    """Top modules by cumulative import time, from python -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+        capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+def worker_memory(master_pid):
+    """(rss_kb, pss_kb) per worker, read from /proc; empty where unavailable"""
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+            workers = [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+    memory = []
+    for pid in workers:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        memory.append((int(fields['Rss'].split()[0]), int(fields['Pss'].split()[0])))
+    return memory
+
+def measure_first_request(port, workers, preload, path, wait):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_PRELOAD=str(preload), RATELIMIT_ENABLED='False')
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    first_request_ms = None
+    try:
+        while time.perf_counter() - started < wait:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=2) as response:
+                    if response.status == 200:
+                        first_request_ms = (time.perf_counter() - started) * 1000
+                        break
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                time.sleep(0.02)
+        # Let every worker finish booting before sampling memory
+        time.sleep(1)
+        memory = worker_memory(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return first_request_ms, memory
+
+def summarize(label, values):
+    print(f"   {label}: median {statistics.median(values):.1f} ms, "
+          f"min {min(values):.1f} ms, max {max(values):.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters / server starts per measurement')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--path', default='/login', help='First request target; /login needs no database')
+    parser.add_argument('--wait', type=float, default=60.0, help='Seconds to wait for the first response')
+    parser.add_argument('--skip-server', action='store_true', help='Only measure import and create_app()')
+    args = parser.parse_args()
+
+    print("🚀 FocusFlow Startup Benchmark")
+    print("=" * 40)
+
+    samples = measure_import(args.runs)
+    print(f"\n📦 Import ({args.runs} fresh interpreters)")
+    summarize("import app", [s['import_ms'] for s in samples])
+    summarize("create_app()", [s['create_app_ms'] for s in samples])
+    summarize("interpreter total", [s['process_ms'] for s in samples])
+    print("   Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(8):
+        print(f"     {cumulative_us / 1000:7.1f} ms  {name}")
+
+    if args.skip_server:
+        return
+
+    for preload in (True, False):
+        timings, memory = [], []
+        for _ in range(args.runs):
+            first_request_ms, worker_mem = measure_first_request(
+                args.port, args.workers, preload, args.path, args.wait)
+            if first_request_ms is None:
+                print(f"\n❌ No 200 from {args.path} within {args.wait:.0f}s (preload={preload})")
+                break
+            timings.append(first_request_ms)
+            memory.extend(worker_mem)
+        if not timings:
+            continue
+        print(f"\n🌐 gunicorn, {args.workers} workers, preload={preload}")
+        summarize("time to first request", timings)
+        if memory:
+            rss = statistics.mean(m[0] for m in memory) / 1024
+            pss = statistics.mean(m[1] for m in memory) / 1024
+            print(f"   worker memory: RSS {rss:.1f} MB, PSS {pss:.1f} MB "
+                  f"({(1 - pss / rss) * 100:.0f}% shared)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+End-to-End Load Test for FocusFlow
+Simulates concurrent timer users: each one signs up, logs in, creates tasks,
+starts timers, sends heartbeats to /api/timer/sync and opens the dashboard and
+analytics, with random think times. Reports throughput and p50/p95/p99 per
+endpoint, and stores the results as a baseline in loadtest_baselines.json
+so later runs can be checked for regressions.
+
+Against a running server (rate limiting must be off):
+    python loadtest.py --base-url http://127.0.0.1:5001 --users 50 --duration 60
+
+Or let the harness migrate a local database and start gunicorn itself:
+    createdb focusflow_load
+    python loadtest.py --database-url 'postgresql://postgres@localhost/focusflow_load?sslmode=disable' \\
+        --users 50 --duration 60 --save-baseline --check
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(ROOT, 'loadtest_baselines.json')
+CSRF_PATTERN = re.compile(r'name="csrf_token" value="([^"]+)"')
+PASSWORD = 'Load-test-password-1'
+
+class Recorder:
+    """Latencies and errors per endpoint, shared by every virtual user"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, started, response=None, error=None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if error is None and response is not None and response.status_code < 400:
+                self.latencies.setdefault(name, []).append(elapsed_ms)
+            else:
+                self.errors.setdefault(name, []).append(error or response.status_code)
+
+    def failing(self, max_rate, min_requests):
+        """Endpoints with at least min_requests whose share of failed requests is above max_rate"""
+        with self._lock:
+            failing = []
+            for name, errors in self.errors.items():
+                total = len(errors) + len(self.latencies.get(name, []))
+                if total >= min_requests and len(errors) > max_rate * total:
+                    failing.append(f"{name}: {len(errors)} of {total} requests failed "
+                                   f"(e.g. {', '.join(sorted(set(map(str, errors)))[:3])})")
+            return failing
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class VirtualUser:
+    def __init__(self, base_url, index, run_id, recorder, args, rng):
+        self.base_url = base_url
+        self.username = f'load_{run_id}_{index}'
+        self.recorder = recorder
+        self.args = args
+        self.rng = rng
+        self.http = requests.Session()
+        self.csrf_token = None
+        self.session_id = f"session_{int(time.time() * 1000)}_{run_id}{index}"
+
+    def request(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, f'{self.base_url}{path}', timeout=30, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.record(name, started, error=type(e).__name__)
+            return None
+        self.recorder.record(name, started, response)
+        return response
+
+    def api(self, name, method, path, payload=None):
+        headers = {'X-CSRFToken': self.csrf_token} if self.csrf_token else {}
+        response = self.request(name, method, path, json=payload, headers=headers)
+        if response is None or response.status_code >= 400:
+            return None
+        return response.json()
+
+    def think(self, stop):
+        stop.wait(self.rng.uniform(self.args.think_min, self.args.think_max))
+
+    def form(self, name, path, data):
+        page = self.request(f'GET {path}', 'GET', path)
+        match = CSRF_PATTERN.search(page.text) if page is not None else None
+        if not match:
+            return False
+        response = self.request(name, 'POST', path, data=dict(data, csrf_token=match.group(1)),
+                                allow_redirects=False)
+        return response is not None and response.status_code == 302
+
+    def sign_up_and_log_in(self):
+        self.form('POST /signup', '/signup', {
+            'username': self.username, 'email': f'{self.username}@example.com', 'password': PASSWORD,
+        })
+        if not self.form('POST /login', '/login', {'username': self.username, 'password': PASSWORD}):
+            return False
+        token = self.api('GET /api/csrf-token', 'GET', '/api/csrf-token')
+        self.csrf_token = token and token.get('csrf_token')
+        return True
+
+    def run(self, stop):
+        if not self.sign_up_and_log_in():
+            return
+        today = date.today().isoformat()
+        self.api('GET /api/daily-summary', 'GET', f'/api/daily-summary?date={today}')
+        while not stop.is_set():
+            task = self.api('POST /api/user-tasks', 'POST', '/api/user-tasks', {
+                'entry_date': today,
+                'title': f'Load task {self.rng.randint(1, 10 ** 6)}',
+                'duration_minutes': self.rng.choice([15, 25, 30, 45, 60]),
+            })
+            if not task:
+                self.think(stop)
+                continue
+            timer = {'task_id': task['id'], 'session_id': self.session_id}
+            self.api('POST /api/timer/start', 'POST', '/api/timer/start', timer)
+            # Heartbeats while the timer runs, like an open dashboard tab
+            focus_until = time.monotonic() + self.rng.uniform(self.args.focus_min, self.args.focus_max)
+            while not stop.is_set() and time.monotonic() < focus_until:
+                stop.wait(self.args.sync_interval)
+                self.api('POST /api/timer/sync', 'POST', '/api/timer/sync', timer)
+            if self.rng.random() < 0.7:
+                self.api('POST /api/timer/stop', 'POST', '/api/timer/stop', timer)
+            else:
+                self.api('POST /api/timer/pause', 'POST', '/api/timer/pause', timer)
+            self.think(stop)
+            self.api('GET /api/daily-summary', 'GET', f'/api/daily-summary?date={today}')
+            if self.rng.random() < 0.3:
+                self.api('GET /api/analytics', 'GET', '/api/analytics')
+            self.think(stop)
+
+def start_server(args):
+    """Migrate the database and start gunicorn; returns the process"""
+    env = dict(os.environ, DATABASE_URL=args.database_url, PORT=str(args.port),
+               RATELIMIT_ENABLED='False', FLASK_ENV='development')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'upgrade'], cwd=ROOT, env=env, check=True)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], cwd=ROOT, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'http://127.0.0.1:{args.port}/ping', timeout=2).status_code == 200:
+                return server
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not start within 60s")
+
+def summarize(recorder, duration):
+    results = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        latencies = recorder.latencies.get(name, [])
+        errors = recorder.errors.get(name, [])
+        results[name] = {
+            'count': len(latencies),
+            'errors': len(errors),
+            'rps': round(len(latencies) / duration, 2),
+            'p50': round(percentile(latencies, 50), 1),
+            'p95': round(percentile(latencies, 95), 1),
+            'p99': round(percentile(latencies, 99), 1),
+        }
+    return results
+
+def print_results(results, duration):
+    print(f"\n{'Endpoint':<28} {'count':>7} {'err':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['count']:>7} {r['errors']:>5} {r['rps']:>7} {r['p50']:>8} {r['p95']:>8} {r['p99']:>8}")
+    total = sum(r['count'] for r in results.values())
+    errors = sum(r['errors'] for r in results.values())
+    print(f"\n📊 {total} requests in {duration:.0f}s ({total / duration:.1f} req/s), {errors} errors")
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return []
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+def check_regressions(results, baseline, tolerance, min_ms):
+    """Endpoints whose p95 grew past tolerance x the baseline's (ignoring sub-min_ms noise)"""
+    regressions = []
+    for name, r in results.items():
+        before = baseline['results'].get(name)
+        if before and r['p95'] > max(before['p95'] * tolerance, min_ms):
+            regressions.append(f"{name}: p95 {before['p95']} -> {r['p95']} ms")
+        if before and r['errors'] > before['errors'] and r['errors'] > 0.01 * (r['count'] + r['errors']):
+            regressions.append(f"{name}: errors {before['errors']} -> {r['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--database-url', help='Migrate this database and start gunicorn on --port for the run')
+    parser.add_argument('--port', type=int, default=5098)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds of load after ramp-up starts')
+    parser.add_argument('--ramp-up', type=float, default=10.0, help='Seconds over which users start')
+    parser.add_argument('--think-min', type=float, default=1.0)
+    parser.add_argument('--think-max', type=float, default=5.0)
+    parser.add_argument('--focus-min', type=float, default=10.0, help='Shortest timer run in seconds')
+    parser.add_argument('--focus-max', type=float, default=40.0)
+    parser.add_argument('--sync-interval', type=float, default=5.0,
+                        help='Seconds between heartbeats (the dashboard uses 60; lower compresses a session)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for think times and actions')
+    parser.add_argument('--label', default=None, help='Baseline label (default: git revision)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'Append the results to {BASELINE_FILE}')
+    parser.add_argument('--check', action='store_true', help='Fail if p95s regressed against the last baseline')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='Allowed p95 growth factor')
+    parser.add_argument('--min-ms', type=float, default=20.0, help='p95s below this never count as regressions')
+    parser.add_argument('--max-error-rate', type=float, default=0.05,
+                        help='Abort, without checking or saving a baseline, once an endpoint fails more often')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url.rstrip('/')
+    if args.database_url:
+        server = start_server(args)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    print("🚀 FocusFlow Load Test")
+    print("=" * 40)
+    print(f"{args.users} users against {base_url} for {args.duration:.0f}s (seed {args.seed})")
+
+    recorder = Recorder()
+    stop = threading.Event()
+    run_id = format(int(time.time()), 'x')
+    rng = random.Random(args.seed)
+    users = [VirtualUser(base_url, i, run_id, recorder, args, random.Random(rng.random()))
+             for i in range(args.users)]
+    threads = [threading.Thread(target=user.run, args=(stop,), daemon=True) for user in users]
+    started = time.monotonic()
+    try:
+        for thread in threads:
+            thread.start()
+            stop.wait(args.ramp_up / max(len(threads), 1))
+        # A broken endpoint would only record errors; stop instead of running out the clock
+        while not stop.wait(min(1.0, max(args.duration - (time.monotonic() - started), 0))):
+            if time.monotonic() - started >= args.duration or recorder.failing(args.max_error_rate, 20):
+                break
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=35)
+    finally:
+        stop.set()
+        if server is not None:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+    duration = time.monotonic() - started
+
+    results = summarize(recorder, duration)
+    print_results(results, duration)
+
+    failing = recorder.failing(args.max_error_rate, 1)
+    if failing:
+        print(f"\n❌ Error rate above {args.max_error_rate:.0%}; results were not compared or saved")
+        for line in failing:
+            print(f"   {line}")
+        sys.exit(1)
+
+    scenario = {key: getattr(args, key) for key in
+                ('users', 'duration', 'think_min', 'think_max', 'focus_min', 'focus_max', 'sync_interval', 'seed')}
+    baselines = load_baselines()
+    failed = False
+    if args.check:
+        previous = [b for b in baselines if b['scenario'] == scenario]
+        if not previous:
+            print("\nℹ️  No baseline for this scenario yet")
+        else:
+            regressions = check_regressions(results, previous[-1], args.tolerance, args.min_ms)
+            print(f"\n🔍 Compared with baseline {previous[-1]['label']} ({previous[-1]['recorded_at']})")
+            for regression in regressions:
+                print(f"❌ {regression}")
+            if not regressions:
+                print("✅ No regressions")
+            failed = bool(regressions)
+    if args.save_baseline:
+        baselines.append({
+            'label': args.label or git_revision(),
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'scenario': scenario,
+            'results': results,
+        })
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baselines, f, indent=2)
+        print(f"💾 Saved baseline to {os.path.basename(BASELINE_FILE)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,8 @@
--- PostgreSQL Schema for FocusFlow
--- Drop tables if they exist to ensure a clean slate (optional, for development)
-DROP TABLE IF EXISTS activity_log CASCADE;
-DROP TABLE IF EXISTS user_notes CASCADE;
-DROP TABLE IF EXISTS daily_entries CASCADE;
-DROP TABLE IF EXISTS user_tasks CASCADE;
-DROP TABLE IF EXISTS users CASCADE;
+-- Base FocusFlow schema: users, tasks, notes, daily entries and the activity log.
+-- IF NOT EXISTS lets databases created before versioned migrations adopt it as-is.
 
 -- Users table
-CREATE TABLE users (
+CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL,
     email VARCHAR(255) UNIQUE NOT NULL,
@@ -16,7 +11,7 @@ CREATE TABLE users (
 );
 
 -- User-defined tasks table
-CREATE TABLE user_tasks (
+CREATE TABLE IF NOT EXISTS user_tasks (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL,
     entry_date DATE NOT NULL, -- YYYY-MM-DD (using DATE type)
@@ -26,15 +21,13 @@ CREATE TABLE user_tasks (
     duration_minutes INTEGER, -- For display and planning
     status VARCHAR(20) NOT NULL DEFAULT 'pending', -- pending, in-progress, completed, paused
     time_spent BIGINT NOT NULL DEFAULT 0, -- Store time in milliseconds
-    timer_start_time TIMESTAMP, -- When current timer session started
-    timer_session_id VARCHAR(100), -- Unique session ID for current timer
-    last_sync_time TIMESTAMP, -- Last time timer was synced with server
+    -- Running timer state lives in active_timers (0005_active_timers.sql)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
 );
 
 -- Daily notes (user-specific) - Updated to support multiple notes per day
-CREATE TABLE daily_entries (
+CREATE TABLE IF NOT EXISTS daily_entries (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL,
     entry_date DATE NOT NULL,
@@ -44,7 +37,7 @@ CREATE TABLE daily_entries (
 );
 
 -- Individual notes table for multiple notes per day
-CREATE TABLE user_notes (
+CREATE TABLE IF NOT EXISTS user_notes (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL,
     entry_date DATE NOT NULL, -- YYYY-MM-DD
@@ -57,7 +50,7 @@ CREATE TABLE user_notes (
 );
 
 -- Activity log (user-specific)
-CREATE TABLE activity_log (
+CREATE TABLE IF NOT EXISTS activity_log (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL,
     message TEXT NOT NULL,
@@ -68,7 +61,7 @@ CREATE TABLE activity_log (
 );
 
 -- Create indexes for better performance
-CREATE INDEX idx_user_tasks_user_date ON user_tasks(user_id, entry_date);
-CREATE INDEX idx_user_notes_user_date ON user_notes(user_id, entry_date);
-CREATE INDEX idx_activity_log_user_timestamp ON activity_log(user_id, timestamp);
-CREATE INDEX idx_daily_entries_user_date ON daily_entries(user_id, entry_date);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_user_tasks_user_date ON user_tasks(user_id, entry_date);
+CREATE INDEX IF NOT EXISTS idx_user_notes_user_date ON user_notes(user_id, entry_date);
+CREATE INDEX IF NOT EXISTS idx_activity_log_user_timestamp ON activity_log(user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_daily_entries_user_date ON daily_entries(user_id, entry_date);
@@ -0,0 +1,111 @@
+-- Per-user statistics rollup, maintained by triggers on user_tasks
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_tasks INTEGER NOT NULL DEFAULT 0,
+    completed_tasks INTEGER NOT NULL DEFAULT 0,
+    total_time_ms BIGINT NOT NULL DEFAULT 0, -- time_spent of all tasks, in milliseconds
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Completed-task buckets per user: weekday ('0' = Sunday .. '6') and month ('YYYY-MM')
+CREATE TABLE IF NOT EXISTS user_stats_buckets (
+    user_id INTEGER NOT NULL,
+    bucket_type VARCHAR(10) NOT NULL, -- weekday, month
+    bucket VARCHAR(7) NOT NULL,
+    completed_tasks INTEGER NOT NULL DEFAULT 0,
+    completed_time_ms BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket_type, bucket),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one task's contribution to the rollups.
+-- Removals only update existing rows so cascading user deletes never re-insert.
+CREATE OR REPLACE FUNCTION user_stats_apply(p_user_id INTEGER, p_entry_date DATE, p_status VARCHAR,
+                                            p_time_spent BIGINT, p_sign INTEGER) RETURNS void AS $$
+DECLARE
+    v_completed INTEGER := CASE WHEN p_status = 'completed' THEN p_sign ELSE 0 END;
+BEGIN
+    IF p_sign > 0 THEN
+        INSERT INTO user_stats (user_id, total_tasks, completed_tasks, total_time_ms)
+        VALUES (p_user_id, 1, v_completed, p_time_spent)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_tasks = user_stats.total_tasks + 1,
+            completed_tasks = user_stats.completed_tasks + EXCLUDED.completed_tasks,
+            total_time_ms = user_stats.total_time_ms + EXCLUDED.total_time_ms,
+            updated_at = CURRENT_TIMESTAMP;
+    ELSE
+        UPDATE user_stats SET
+            total_tasks = total_tasks - 1,
+            completed_tasks = completed_tasks + v_completed,
+            total_time_ms = total_time_ms - p_time_spent,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = p_user_id;
+    END IF;
+
+    IF p_status = 'completed' THEN
+        IF p_sign > 0 THEN
+            INSERT INTO user_stats_buckets (user_id, bucket_type, bucket, completed_tasks, completed_time_ms)
+            VALUES (p_user_id, 'weekday', EXTRACT(DOW FROM p_entry_date)::text, 1, p_time_spent),
+                   (p_user_id, 'month', TO_CHAR(p_entry_date, 'YYYY-MM'), 1, p_time_spent)
+            ON CONFLICT (user_id, bucket_type, bucket) DO UPDATE SET
+                completed_tasks = user_stats_buckets.completed_tasks + 1,
+                completed_time_ms = user_stats_buckets.completed_time_ms + EXCLUDED.completed_time_ms;
+        ELSE
+            UPDATE user_stats_buckets SET
+                completed_tasks = completed_tasks - 1,
+                completed_time_ms = completed_time_ms - p_time_spent
+            WHERE user_id = p_user_id
+              AND ((bucket_type = 'weekday' AND bucket = EXTRACT(DOW FROM p_entry_date)::text)
+                OR (bucket_type = 'month' AND bucket = TO_CHAR(p_entry_date, 'YYYY-MM')));
+        END IF;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_tasks_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM user_stats_apply(OLD.user_id, OLD.entry_date, OLD.status, OLD.time_spent, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM user_stats_apply(NEW.user_id, NEW.entry_date, NEW.status, NEW.time_spent, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_tasks_stats_insert_delete ON user_tasks;
+CREATE TRIGGER user_tasks_stats_insert_delete
+    AFTER INSERT OR DELETE ON user_tasks
+    FOR EACH ROW EXECUTE FUNCTION user_tasks_stats_trigger();
+
+-- Timer heartbeats only touch last_sync_time and never fire this trigger
+DROP TRIGGER IF EXISTS user_tasks_stats_update ON user_tasks;
+CREATE TRIGGER user_tasks_stats_update
+    AFTER UPDATE OF user_id, entry_date, status, time_spent ON user_tasks
+    FOR EACH ROW
+    WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id
+          OR OLD.entry_date IS DISTINCT FROM NEW.entry_date
+          OR OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.time_spent IS DISTINCT FROM NEW.time_spent)
+    EXECUTE FUNCTION user_tasks_stats_trigger();
+
+-- Backfill the rollups the first time they are created. The triggers above hold
+-- a lock on user_tasks until this script commits, so no write can slip between.
+INSERT INTO user_stats (user_id, total_tasks, completed_tasks, total_time_ms)
+SELECT user_id, COUNT(*), COUNT(*) FILTER (WHERE status = 'completed'), COALESCE(SUM(time_spent), 0)
+FROM user_tasks
+WHERE NOT EXISTS (SELECT 1 FROM user_stats)
+GROUP BY user_id;
+
+INSERT INTO user_stats_buckets (user_id, bucket_type, bucket, completed_tasks, completed_time_ms)
+SELECT user_id, 'weekday', EXTRACT(DOW FROM entry_date)::text, COUNT(*), COALESCE(SUM(time_spent), 0)
+FROM user_tasks
+WHERE status = 'completed' AND NOT EXISTS (SELECT 1 FROM user_stats_buckets)
+GROUP BY user_id, EXTRACT(DOW FROM entry_date)
+UNION ALL
+SELECT user_id, 'month', TO_CHAR(entry_date, 'YYYY-MM'), COUNT(*), COALESCE(SUM(time_spent), 0)
+FROM user_tasks
+WHERE status = 'completed' AND NOT EXISTS (SELECT 1 FROM user_stats_buckets)
+GROUP BY user_id, TO_CHAR(entry_date, 'YYYY-MM');
@@ -0,0 +1,184 @@
+-- Completed tasks per user and day; the streak engine reacts when a day flips between 0 and 1
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    user_id INTEGER NOT NULL,
+    entry_date DATE NOT NULL,
+    completed_tasks INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, entry_date),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Maximal runs of consecutive days with at least one completed task
+CREATE TABLE IF NOT EXISTS user_streak_runs (
+    user_id INTEGER NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    PRIMARY KEY (user_id, start_date),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_streak_runs_user_end ON user_streak_runs(user_id, end_date);
+CREATE INDEX IF NOT EXISTS idx_user_streak_runs_user_length ON user_streak_runs(user_id, (end_date - start_date));
+
+-- Per-user streak summary: current_streak is the length of the run ending on last_completed_date
+CREATE TABLE IF NOT EXISTS user_streaks (
+    user_id INTEGER PRIMARY KEY,
+    current_streak INTEGER NOT NULL DEFAULT 0,
+    longest_streak INTEGER NOT NULL DEFAULT 0,
+    last_completed_date DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Lock (creating if needed) the user's streak row so concurrent run updates serialize
+CREATE OR REPLACE FUNCTION streak_lock_user(p_user_id INTEGER) RETURNS void AS $$
+BEGIN
+    INSERT INTO user_streaks (user_id) VALUES (p_user_id)
+    ON CONFLICT (user_id) DO UPDATE SET updated_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A day gained its first completed task: merge it with the neighbouring runs
+CREATE OR REPLACE FUNCTION streak_add_day(p_user_id INTEGER, p_day DATE) RETURNS void AS $$
+DECLARE
+    v_prev_start DATE;
+    v_next_end DATE;
+    v_start DATE;
+    v_end DATE;
+BEGIN
+    PERFORM streak_lock_user(p_user_id);
+
+    DELETE FROM user_streak_runs WHERE user_id = p_user_id AND end_date = p_day - 1
+    RETURNING start_date INTO v_prev_start;
+    DELETE FROM user_streak_runs WHERE user_id = p_user_id AND start_date = p_day + 1
+    RETURNING end_date INTO v_next_end;
+
+    v_start := COALESCE(v_prev_start, p_day);
+    v_end := COALESCE(v_next_end, p_day);
+    INSERT INTO user_streak_runs (user_id, start_date, end_date) VALUES (p_user_id, v_start, v_end);
+
+    UPDATE user_streaks SET
+        longest_streak = GREATEST(longest_streak, v_end - v_start + 1),
+        current_streak = CASE WHEN last_completed_date IS NULL OR v_end >= last_completed_date
+                              THEN v_end - v_start + 1 ELSE current_streak END,
+        last_completed_date = GREATEST(last_completed_date, v_end)
+    WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A day lost its last completed task: split the run that contained it
+CREATE OR REPLACE FUNCTION streak_remove_day(p_user_id INTEGER, p_day DATE) RETURNS void AS $$
+DECLARE
+    v_start DATE;
+    v_end DATE;
+    v_streak user_streaks%ROWTYPE;
+BEGIN
+    PERFORM streak_lock_user(p_user_id);
+
+    DELETE FROM user_streak_runs
+    WHERE user_id = p_user_id AND end_date >= p_day
+      AND start_date = (SELECT start_date FROM user_streak_runs
+                        WHERE user_id = p_user_id AND start_date <= p_day
+                        ORDER BY start_date DESC LIMIT 1)
+    RETURNING start_date, end_date INTO v_start, v_end;
+    IF v_start IS NULL THEN
+        RETURN;
+    END IF;
+
+    IF v_start < p_day THEN
+        INSERT INTO user_streak_runs (user_id, start_date, end_date) VALUES (p_user_id, v_start, p_day - 1);
+    END IF;
+    IF v_end > p_day THEN
+        INSERT INTO user_streak_runs (user_id, start_date, end_date) VALUES (p_user_id, p_day + 1, v_end);
+    END IF;
+
+    SELECT * INTO v_streak FROM user_streaks WHERE user_id = p_user_id;
+    IF v_end - v_start + 1 >= v_streak.longest_streak THEN
+        v_streak.longest_streak := COALESCE((SELECT end_date - start_date + 1 FROM user_streak_runs
+                                             WHERE user_id = p_user_id
+                                             ORDER BY end_date - start_date DESC LIMIT 1), 0);
+    END IF;
+    IF v_end >= v_streak.last_completed_date THEN
+        -- The split run was the most recent one; find the new latest run
+        v_start := NULL;
+        v_end := NULL;
+        SELECT start_date, end_date INTO v_start, v_end FROM user_streak_runs
+        WHERE user_id = p_user_id ORDER BY end_date DESC LIMIT 1;
+        v_streak.last_completed_date := v_end;
+        v_streak.current_streak := COALESCE(v_end - v_start + 1, 0);
+    END IF;
+
+    UPDATE user_streaks SET
+        current_streak = v_streak.current_streak,
+        longest_streak = v_streak.longest_streak,
+        last_completed_date = v_streak.last_completed_date
+    WHERE user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_daily_completed_apply(p_user_id INTEGER, p_day DATE, p_delta INTEGER) RETURNS void AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    INSERT INTO user_daily_stats (user_id, entry_date, completed_tasks) VALUES (p_user_id, p_day, p_delta)
+    ON CONFLICT (user_id, entry_date) DO UPDATE SET
+        completed_tasks = user_daily_stats.completed_tasks + EXCLUDED.completed_tasks
+    RETURNING completed_tasks INTO v_count;
+
+    IF p_delta > 0 AND v_count = 1 THEN
+        PERFORM streak_add_day(p_user_id, p_day);
+    ELSIF p_delta < 0 AND v_count = 0 THEN
+        PERFORM streak_remove_day(p_user_id, p_day);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_tasks_streak_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'completed' THEN
+        -- Skip tasks removed by a cascading user delete; the rollup rows go with the user
+        IF TG_OP = 'UPDATE' OR EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+            PERFORM user_daily_completed_apply(OLD.user_id, OLD.entry_date, -1);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'completed' THEN
+        PERFORM user_daily_completed_apply(NEW.user_id, NEW.entry_date, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_tasks_streak_insert_delete ON user_tasks;
+CREATE TRIGGER user_tasks_streak_insert_delete
+    AFTER INSERT OR DELETE ON user_tasks
+    FOR EACH ROW EXECUTE FUNCTION user_tasks_streak_trigger();
+
+DROP TRIGGER IF EXISTS user_tasks_streak_update ON user_tasks;
+CREATE TRIGGER user_tasks_streak_update
+    AFTER UPDATE OF user_id, entry_date, status ON user_tasks
+    FOR EACH ROW
+    WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id
+          OR OLD.entry_date IS DISTINCT FROM NEW.entry_date
+          OR OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION user_tasks_streak_trigger();
+
+-- Backfill the streak tables the first time they are created
+INSERT INTO user_daily_stats (user_id, entry_date, completed_tasks)
+SELECT user_id, entry_date, COUNT(*)
+FROM user_tasks
+WHERE status = 'completed' AND NOT EXISTS (SELECT 1 FROM user_daily_stats)
+GROUP BY user_id, entry_date;
+
+INSERT INTO user_streak_runs (user_id, start_date, end_date)
+SELECT user_id, MIN(entry_date), MAX(entry_date)
+FROM (SELECT user_id, entry_date,
+             entry_date - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY entry_date))::int AS island
+      FROM user_daily_stats
+      WHERE completed_tasks > 0 AND NOT EXISTS (SELECT 1 FROM user_streak_runs)) days
+GROUP BY user_id, island;
+
+INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_completed_date)
+SELECT DISTINCT ON (user_id) user_id, end_date - start_date + 1,
+       MAX(end_date - start_date + 1) OVER (PARTITION BY user_id), end_date
+FROM user_streak_runs
+WHERE NOT EXISTS (SELECT 1 FROM user_streaks)
+ORDER BY user_id, end_date DESC;
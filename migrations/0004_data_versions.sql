@@ -0,0 +1,75 @@
+-- Version stamps backing the ETags of the dashboard read endpoints.
+-- scope is 'tasks' (any task change) or an entry date formatted YYYY-MM-DD.
+CREATE TABLE IF NOT EXISTS user_data_versions (
+    user_id INTEGER NOT NULL,
+    scope VARCHAR(10) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, scope),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Skips users that no longer exist so cascading user deletes keep working
+CREATE OR REPLACE FUNCTION bump_data_version(p_user_id INTEGER, p_scope VARCHAR) RETURNS void AS $$
+BEGIN
+    INSERT INTO user_data_versions (user_id, scope, version)
+    SELECT p_user_id, p_scope, 1 WHERE EXISTS (SELECT 1 FROM users WHERE id = p_user_id)
+    ON CONFLICT (user_id, scope) DO UPDATE SET version = user_data_versions.version + 1;
+    -- Delivered on commit to the /api/events streams; identical payloads in one transaction collapse
+    PERFORM pg_notify('focusflow_events', json_build_object('user_id', p_user_id, 'type', 'data', 'scope', p_scope)::text);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION user_tasks_version_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_data_version(OLD.user_id, 'tasks');
+        PERFORM bump_data_version(OLD.user_id, TO_CHAR(OLD.entry_date, 'YYYY-MM-DD'));
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND (OLD.user_id, OLD.entry_date) IS DISTINCT FROM (NEW.user_id, NEW.entry_date)) THEN
+        PERFORM bump_data_version(NEW.user_id, 'tasks');
+        PERFORM bump_data_version(NEW.user_id, TO_CHAR(NEW.entry_date, 'YYYY-MM-DD'));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION entry_date_version_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_data_version(OLD.user_id, TO_CHAR(OLD.entry_date, 'YYYY-MM-DD'));
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND (OLD.user_id, OLD.entry_date) IS DISTINCT FROM (NEW.user_id, NEW.entry_date)) THEN
+        PERFORM bump_data_version(NEW.user_id, TO_CHAR(NEW.entry_date, 'YYYY-MM-DD'));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION activity_log_version_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM bump_data_version(NEW.user_id, TO_CHAR(NEW.timestamp, 'YYYY-MM-DD'));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_tasks_version ON user_tasks;
+CREATE TRIGGER user_tasks_version
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, entry_date, title, description, start_time, duration_minutes,
+                                        status, time_spent
+    ON user_tasks
+    FOR EACH ROW EXECUTE FUNCTION user_tasks_version_trigger();
+
+DROP TRIGGER IF EXISTS user_notes_version ON user_notes;
+CREATE TRIGGER user_notes_version
+    AFTER INSERT OR UPDATE OR DELETE ON user_notes
+    FOR EACH ROW EXECUTE FUNCTION entry_date_version_trigger();
+
+DROP TRIGGER IF EXISTS daily_entries_version ON daily_entries;
+CREATE TRIGGER daily_entries_version
+    AFTER INSERT OR UPDATE OR DELETE ON daily_entries
+    FOR EACH ROW EXECUTE FUNCTION entry_date_version_trigger();
+
+DROP TRIGGER IF EXISTS activity_log_version ON activity_log;
+CREATE TRIGGER activity_log_version
+    AFTER INSERT ON activity_log
+    FOR EACH ROW EXECUTE FUNCTION activity_log_version_trigger();
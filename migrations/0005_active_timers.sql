@@ -0,0 +1,64 @@
+-- Running timers, at most one per user. Heartbeats update last_sync_time here
+-- instead of rewriting the wide user_tasks row; the low fillfactor leaves room
+-- for HOT updates, which never touch the indexes.
+CREATE TABLE IF NOT EXISTS active_timers (
+    user_id INTEGER PRIMARY KEY,
+    task_id INTEGER NOT NULL,
+    session_id VARCHAR(100) NOT NULL, -- Unique session ID for the running timer
+    started_at TIMESTAMP NOT NULL, -- When the current timer session started
+    last_sync_time TIMESTAMP NOT NULL, -- Last heartbeat from the client
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (task_id) REFERENCES user_tasks (id) ON DELETE CASCADE
+) WITH (fillfactor = 50);
+
+ALTER TABLE active_timers SET (autovacuum_vacuum_scale_factor = 0, autovacuum_vacuum_threshold = 500);
+
+CREATE INDEX IF NOT EXISTS idx_active_timers_task ON active_timers(task_id);
+
+-- Timer start/pause/stop/cleanup: push an event and invalidate the task's day
+CREATE OR REPLACE FUNCTION active_timers_event_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('focusflow_events', json_build_object(
+            'user_id', OLD.user_id, 'type', 'timer', 'task_id', OLD.task_id, 'session_id', NULL)::text);
+        PERFORM bump_data_version(OLD.user_id, TO_CHAR(t.entry_date, 'YYYY-MM-DD'))
+        FROM user_tasks t WHERE t.id = OLD.task_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('focusflow_events', json_build_object(
+            'user_id', NEW.user_id, 'type', 'timer', 'task_id', NEW.task_id, 'session_id', NEW.session_id)::text);
+        PERFORM bump_data_version(NEW.user_id, TO_CHAR(t.entry_date, 'YYYY-MM-DD'))
+        FROM user_tasks t WHERE t.id = NEW.task_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Heartbeats (last_sync_time only) do not fire this trigger
+DROP TRIGGER IF EXISTS active_timers_event ON active_timers;
+CREATE TRIGGER active_timers_event
+    AFTER INSERT OR DELETE OR UPDATE OF task_id, session_id, started_at ON active_timers
+    FOR EACH ROW EXECUTE FUNCTION active_timers_event_trigger();
+
+-- Move running timers out of user_tasks (the most recent one per user) and drop the old columns
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'user_tasks'
+                 AND column_name = 'timer_session_id') THEN
+        EXECUTE $migrate$
+            INSERT INTO active_timers (user_id, task_id, session_id, started_at, last_sync_time)
+            SELECT DISTINCT ON (user_id) user_id, id, timer_session_id, timer_start_time,
+                   COALESCE(last_sync_time, timer_start_time)
+            FROM user_tasks
+            WHERE timer_session_id IS NOT NULL AND timer_start_time IS NOT NULL
+            ORDER BY user_id, timer_start_time DESC
+            ON CONFLICT (user_id) DO NOTHING
+        $migrate$;
+        ALTER TABLE user_tasks
+            DROP COLUMN timer_start_time,
+            DROP COLUMN timer_session_id,
+            DROP COLUMN last_sync_time;
+    END IF;
+END;
+$$;
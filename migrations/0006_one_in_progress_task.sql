@@ -0,0 +1,16 @@
+-- At most one in-progress task per user. An exclusion constraint rather than a
+-- partial unique index so it can be deferred: a timer start pauses the previous
+-- task and starts the new one in a single statement, in either order.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'user_tasks_one_in_progress') THEN
+        -- Tasks left in-progress without a running timer are stale sessions
+        UPDATE user_tasks t SET status = 'paused'
+        WHERE t.status = 'in-progress'
+          AND NOT EXISTS (SELECT 1 FROM active_timers a WHERE a.task_id = t.id);
+        ALTER TABLE user_tasks ADD CONSTRAINT user_tasks_one_in_progress
+            EXCLUDE USING btree (user_id WITH =) WHERE (status = 'in-progress')
+            DEFERRABLE INITIALLY DEFERRED;
+    END IF;
+END;
+$$;
@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+-- user_tasks and activity_log are the largest tables, so these indexes are built
+-- without blocking writes. Each statement runs on its own, outside a transaction.
+
+-- Completed-task lookups (per-user rebuilds and checks of the rollups)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_tasks_user_completed ON user_tasks (user_id, entry_date)
+    WHERE status = 'completed';
+
+-- Deleting a task nulls activity_log.task_db_id; without this each delete scans the log
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_activity_log_task ON activity_log (task_db_id)
+    WHERE task_db_id IS NOT NULL;
@@ -0,0 +1,55 @@
+-- All tasks and tracked time per user and day, next to the completed count the
+-- streak engine keeps. The activity heatmap reads a year of these rows at once.
+-- Days whose tasks are all gone keep a row of zeros.
+ALTER TABLE user_daily_stats
+    ADD COLUMN IF NOT EXISTS total_tasks INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_time_ms BIGINT NOT NULL DEFAULT 0;
+
+-- Block task writes until this script commits so none can slip between the
+-- trigger change and the backfill
+LOCK TABLE user_tasks IN SHARE MODE;
+
+-- Removals only update existing rows so cascading user deletes never re-insert
+CREATE OR REPLACE FUNCTION user_daily_totals_apply(p_user_id INTEGER, p_day DATE, p_time_spent BIGINT,
+                                                   p_sign INTEGER) RETURNS void AS $$
+BEGIN
+    IF p_sign > 0 THEN
+        INSERT INTO user_daily_stats (user_id, entry_date, total_tasks, total_time_ms)
+        VALUES (p_user_id, p_day, 1, p_time_spent)
+        ON CONFLICT (user_id, entry_date) DO UPDATE SET
+            total_tasks = user_daily_stats.total_tasks + 1,
+            total_time_ms = user_daily_stats.total_time_ms + EXCLUDED.total_time_ms;
+    ELSE
+        UPDATE user_daily_stats SET
+            total_tasks = total_tasks - 1,
+            total_time_ms = total_time_ms - p_time_spent
+        WHERE user_id = p_user_id AND entry_date = p_day;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same triggers as before (user_tasks_stats_insert_delete / _update), which
+-- already fire on every change to user_id, entry_date, status or time_spent.
+-- Pausing or stopping a timer credits time_spent and so lands here too.
+CREATE OR REPLACE FUNCTION user_tasks_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM user_stats_apply(OLD.user_id, OLD.entry_date, OLD.status, OLD.time_spent, -1);
+        PERFORM user_daily_totals_apply(OLD.user_id, OLD.entry_date, OLD.time_spent, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM user_stats_apply(NEW.user_id, NEW.entry_date, NEW.status, NEW.time_spent, 1);
+        PERFORM user_daily_totals_apply(NEW.user_id, NEW.entry_date, NEW.time_spent, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill; days without a completed task get their first row here
+INSERT INTO user_daily_stats (user_id, entry_date, completed_tasks, total_tasks, total_time_ms)
+SELECT user_id, entry_date, 0, COUNT(*), COALESCE(SUM(time_spent), 0)
+FROM user_tasks
+GROUP BY user_id, entry_date
+ON CONFLICT (user_id, entry_date) DO UPDATE SET
+    total_tasks = EXCLUDED.total_tasks,
+    total_time_ms = EXCLUDED.total_time_ms;
@@ -14,6 +14,17 @@ document.addEventListener('DOMContentLoaded', async function() {
   let baseTimeSpent = 0; // Base time from server when timer started
   let lastSyncTime = null; // Last time we synced with server
 
+  // --- Live Updates (Server-Sent Events) ---
+  let eventSource = null;
+  let eventStreamConnected = false; // Polling only runs while the stream is down
+  let liveRefreshTimeout = null;
+  let timerActionPending = false; // Ignore our own timer events while a request is in flight
+
+  // --- Paginated Lists (older pages load on demand) ---
+  let activityNextCursor = null;
+  let notesNextCursor = null;
+  let loadedNotes = []; // Notes rendered so far for the viewed date
+
   // DOM elements
   const timerDisplay = document.getElementById('timerDisplay');
   const startBtn = document.getElementById('startBtn');
@@ -266,10 +277,12 @@ document.addEventListener('DOMContentLoaded', async function() {
     }
     
     setInterval(updateDateTime, 1000 * 30); // Update time less frequently
-    setInterval(refreshDataPeriodically, 1000 * 60 * 5); // Refresh data every 5 mins
+    setInterval(refreshDataPeriodically, 1000 * 60 * 5); // Fallback refresh every 5 mins when the event stream is down
+    connectEventStream();
   }
 
   async function refreshDataPeriodically() {
+    if (eventStreamConnected) return; // Changes are pushed by the event stream
     if (timerState === 'running') return; // Don't refresh if timer is active
     const dateString = getTodayDateString();
     const summaryData = await fetchData(`/api/daily-summary?date=${dateString}`);
@@ -390,11 +403,12 @@ document.addEventListener('DOMContentLoaded', async function() {
       // Get client-calculated time before pausing
       const finalTime = getCurrentElapsedTime();
       
+      timerActionPending = true;
       const result = await fetchData('/api/timer/pause', 'POST', {
         task_id: currentSelectedTaskId,
         session_id: currentSessionId,
         client_time: finalTime
-      });
+      }).finally(() => { timerActionPending = false; });
       
       if (!result) {
         showNotification('Failed to pause timer. Please try again.', 'error');
@@ -527,6 +541,55 @@ document.addEventListener('DOMContentLoaded', async function() {
     }
   }
 
+  function connectEventStream() {
+    if (!window.EventSource) return; // Older browsers keep polling
+
+    eventSource = new EventSource('/api/events');
+    eventSource.addEventListener('ready', () => {
+      eventStreamConnected = true;
+    });
+    eventSource.addEventListener('error', () => {
+      eventStreamConnected = false;
+      // EventSource reconnects by itself unless the server refused the stream
+      if (eventSource.readyState === EventSource.CLOSED) {
+        setTimeout(connectEventStream, 60000);
+      }
+    });
+    eventSource.addEventListener('timer', (e) => handleTimerEvent(JSON.parse(e.data)));
+    eventSource.addEventListener('data', (e) => {
+      const event = JSON.parse(e.data);
+      // 'tasks' covers the streak, which depends on every day
+      if (event.scope === getCurrentViewDateString() || event.scope === 'tasks') {
+        scheduleLiveRefresh();
+      }
+    });
+    eventSource.addEventListener('resync', scheduleLiveRefresh);
+  }
+
+  function handleTimerEvent(event) {
+    if (timerActionPending) return;
+
+    if (timerState === 'running' && event.task_id === currentSelectedTaskId && event.session_id !== currentSessionId) {
+      // Our session was paused, stopped or replaced from another tab or device
+      resetTimerUI();
+      showNotification('Timer was changed from another tab or device.', 'warning');
+    } else if (timerState !== 'running' && event.session_id && getCurrentViewDateString() === getTodayDateString()) {
+      // A timer was started elsewhere; pick it up here too
+      checkForRunningTimer();
+      return;
+    }
+    scheduleLiveRefresh();
+  }
+
+  function scheduleLiveRefresh() {
+    // Several events usually arrive together; refresh once (a 304 when nothing changed)
+    clearTimeout(liveRefreshTimeout);
+    liveRefreshTimeout = setTimeout(() => {
+      if (timerState === 'running') return; // Don't re-render while the timer is active
+      loadDataForDate(getCurrentViewDateString());
+    }, 500);
+  }
+
   function resetTimerUI() {
     timerState = 'stopped';
     currentSessionId = null;
@@ -841,9 +904,12 @@ document.addEventListener('DOMContentLoaded', async function() {
     }
   }
   
-  function renderActivityLog(logs) {
-    activityLog.innerHTML = '';
-    if (!logs || logs.length === 0) {
+  function renderActivityLog(logs, nextCursor = null, append = false) {
+    if (!append) activityLog.innerHTML = '';
+    const moreBtn = activityLog.querySelector('.load-more-btn');
+    if (moreBtn) moreBtn.remove();
+    activityNextCursor = nextCursor;
+    if (!append && (!logs || logs.length === 0)) {
       activityLog.innerHTML = '<div class="activity-item" style="text-align:center; color:var(--secondary-text);">No activity yet today</div>';
       return;
     }
@@ -852,8 +918,31 @@ document.addEventListener('DOMContentLoaded', async function() {
       logEl.className = 'activity-item';
       const timeString = new Date(log.timestamp).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
       logEl.innerHTML = `${log.message}<div class="activity-time">${timeString}</div>`;
-      activityLog.appendChild(logEl); // Original appends, but prepend might be better for recent first. Keeping as append for now.
+      activityLog.appendChild(logEl); // Newest first; older pages are appended below
     });
+    if (activityNextCursor) {
+      activityLog.appendChild(createLoadMoreButton(loadOlderActivity));
+    }
+  }
+
+  function createLoadMoreButton(onClick) {
+    const button = document.createElement('button');
+    button.className = 'btn-tiny load-more-btn';
+    button.textContent = 'Show older';
+    button.addEventListener('click', async () => {
+      button.disabled = true;
+      await onClick();
+      button.disabled = false;
+    });
+    return button;
+  }
+
+  async function loadOlderActivity() {
+    if (!activityNextCursor) return;
+    const dateString = getCurrentViewDateString();
+    const result = await fetchData(`/api/activity-log?date=${dateString}&cursor=${encodeURIComponent(activityNextCursor)}`);
+    if (!result) return;
+    renderActivityLog(result.activity, result.next_cursor, true);
   }
 
   function renderStreak(streakCount) {
@@ -1146,10 +1235,17 @@ document.addEventListener('DOMContentLoaded', async function() {
     await loadIndividualNotesForDate(getCurrentViewDateString());
   }
   
-  function renderNotesList(notes) {
-    notesList.innerHTML = '';
+  function renderNotesList(notes, nextCursor = null, append = false) {
+    if (!append) {
+      notesList.innerHTML = '';
+      loadedNotes = [];
+    }
+    const moreBtn = notesList.querySelector('.load-more-btn');
+    if (moreBtn) moreBtn.remove();
+    notesNextCursor = nextCursor;
+    loadedNotes = loadedNotes.concat(notes || []);
     
-    if (!notes || notes.length === 0) {
+    if (!append && (!notes || notes.length === 0)) {
       notesList.innerHTML = '<p style="color: var(--secondary-text); font-size: 0.9em; text-align: center; padding: 20px;">No notes for today. Click "Add Note" to create one!</p>';
       return;
     }
@@ -1178,6 +1274,18 @@ document.addEventListener('DOMContentLoaded', async function() {
       
       notesList.appendChild(noteEl);
     });
+
+    if (notesNextCursor) {
+      notesList.appendChild(createLoadMoreButton(loadOlderNotes));
+    }
+  }
+
+  async function loadOlderNotes() {
+    if (!notesNextCursor) return;
+    const dateString = getCurrentViewDateString();
+    const result = await fetchData(`/api/user-notes?date=${dateString}&cursor=${encodeURIComponent(notesNextCursor)}`);
+    if (!result) return;
+    renderNotesList(result.notes, result.next_cursor, true);
   }
   
   async function handleAddNote(event) {
@@ -1217,27 +1325,22 @@ document.addEventListener('DOMContentLoaded', async function() {
   }
   
   function openEditNoteModal(noteId) {
-    // Find the note data
-    // For simplicity, we'll fetch it from the server
-    fetchData(`/api/user-notes`).then(result => {
-      if (!result || !result.notes) return;
-      
-      const note = result.notes.find(n => n.id === noteId);
-      if (!note) return;
-      
-      // Populate form
-      document.getElementById('editNoteId').value = noteId;
-      document.getElementById('newNoteTitle').value = note.title || '';
-      document.getElementById('newNoteContent').value = note.content;
-      document.getElementById('newNoteType').value = note.note_type;
-      
-      // Change modal state to edit mode
-      addNoteForm.dataset.editing = noteId;
-      
-      document.getElementById('addNoteModalTitle').textContent = "Edit Note";
-      document.getElementById('addNoteSubmitBtn').textContent = "Save Changes";
-      addNoteModal.style.display = 'block';
-    });
+    // Find the note among those already loaded for the viewed date
+    const note = loadedNotes.find(n => n.id === noteId);
+    if (!note) return;
+    
+    // Populate form
+    document.getElementById('editNoteId').value = noteId;
+    document.getElementById('newNoteTitle').value = note.title || '';
+    document.getElementById('newNoteContent').value = note.content;
+    document.getElementById('newNoteType').value = note.note_type;
+    
+    // Change modal state to edit mode
+    addNoteForm.dataset.editing = noteId;
+    
+    document.getElementById('addNoteModalTitle').textContent = "Edit Note";
+    document.getElementById('addNoteSubmitBtn').textContent = "Save Changes";
+    addNoteModal.style.display = 'block';
   }
   
   async function handleUpdateNote(noteId) {
@@ -1286,7 +1389,7 @@ document.addEventListener('DOMContentLoaded', async function() {
     if (!summaryData) return;
 
     dailyTasks = summaryData.tasks || [];
-    renderActivityLog(summaryData.activityLog);
+    renderActivityLog(summaryData.activityLog, summaryData.activityNextCursor);
     renderStreak(summaryData.streak);
     
     renderSchedule();
@@ -1353,7 +1456,7 @@ document.addEventListener('DOMContentLoaded', async function() {
     
     if (!result) return;
     
-    renderNotesList(result.notes);
+    renderNotesList(result.notes, result.next_cursor);
   }
 
   // --- Theme Toggle Functions ---
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Test for FocusFlow
+Seeds a large dataset, then drives the API through Flask's test client and
+the per-user CLI commands (rebuild-stats, check-stats, reap-timers,
+import-tasks) while recording every SELECT/INSERT/UPDATE/DELETE sent on any
+cursor, including the export's server-side cursors. EXPLAINs each recorded
+statement and fails if one plans a sequential scan over a large table.
+
+Whole-table maintenance (rebuild-stats or check-stats for all users, seed,
+migrations) reads every row by design and is not checked.
+
+The target database is wiped and re-created. Use a throwaway database:
+    createdb focusflow_plans
+    QUERY_PLAN_DATABASE_URL=postgresql://localhost/focusflow_plans python test_query_plans.py
+"""
+
+import argparse
+import functools
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import psycopg2.extensions
+
+PASSWORD = 'Plan-test-password-1'
+
+SEED_SQL = """
+SELECT setseed(0.42);
+
+INSERT INTO users (username, email, password_hash)
+SELECT 'plan_user_' || g, 'plan_user_' || g || '@example.com', %(password_hash)s
+FROM generate_series(1, %(users)s) g;
+
+INSERT INTO user_tasks (user_id, entry_date, title, start_time, duration_minutes, status, time_spent, created_at)
+SELECT u.id, d::date, 'Task ' || n, make_time(7 + n, 0, 0), 30,
+       CASE WHEN random() < 0.6 THEN 'completed' WHEN random() < 0.5 THEN 'paused' ELSE 'pending' END,
+       (random() * 3600000)::bigint, d + make_interval(hours => 7 + n)
+FROM users u,
+     generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE - 1, interval '1 day') d,
+     generate_series(1, %(tasks_per_day)s) n;
+
+INSERT INTO activity_log (user_id, message, timestamp, task_db_id)
+SELECT user_id, 'Started timer for: ' || title, created_at, id FROM user_tasks;
+INSERT INTO activity_log (user_id, message, timestamp, task_db_id)
+SELECT user_id, 'Completed task: ' || title, created_at + interval '30 minutes', id
+FROM user_tasks WHERE status = 'completed';
+
+INSERT INTO user_notes (user_id, entry_date, title, content, note_type, created_at, updated_at)
+SELECT u.id, d::date, 'Note', 'Seeded note', 'general', d + interval '20 hours', d + interval '20 hours'
+FROM users u, generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE - 1, interval '1 day') d;
+
+INSERT INTO daily_entries (user_id, entry_date, notes)
+SELECT u.id, d::date, 'Seeded daily notes'
+FROM users u, generate_series(CURRENT_DATE - %(days)s, CURRENT_DATE - 1, interval '1 day') d;
+"""
+
+SEEDED_TABLES = ('user_tasks', 'activity_log', 'user_notes', 'daily_entries')
+
+IMPORT_CSV = """entry_date,title,description,start_time,duration_minutes,status,time_spent
+{day},Imported plan check,Imported,09:00,30,completed,600000
+{day},Second imported task,,10:00,15,pending,0
+"""
+
+# Statements EXPLAIN can plan; DDL, LOCK, SET, LISTEN and COPY are skipped
+PLANNABLE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+
+# (query, params) recorded while this is a list; None while not recording
+recorded = None
+
+@functools.lru_cache(maxsize=None)
+def recording_cursor(base):
+    """Subclass of a cursor class that records the statements it executes"""
+    class RecordingCursor(base):
+        def execute(self, query, vars=None):
+            if recorded is not None:
+                text = query.decode('utf-8') if isinstance(query, bytes) else query
+                if PLANNABLE.match(text):
+                    recorded.append((text, vars))
+            return super().execute(query, vars)
+    return RecordingCursor
+
+class RecordingConnection(psycopg2.extensions.connection):
+    """Connection whose cursors, plain, dict or named, all record their statements"""
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = recording_cursor(base)
+        return super().cursor(*args, **kwargs)
+
+def seed(focusflow, app, args):
+    """Bulk-load the dataset with row triggers off, then rebuild the rollups once"""
+    from werkzeug.security import generate_password_hash
+    with app.app_context():
+        db = focusflow.get_db()
+        cursor = db.cursor()
+        for table in SEEDED_TABLES:
+            cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+        cursor.execute(SEED_SQL, {
+            'password_hash': generate_password_hash(PASSWORD, method=focusflow.password_hasher.method),
+            'users': args.users,
+            'days': args.days,
+            'tasks_per_day': args.tasks_per_day,
+        })
+        for table in SEEDED_TABLES:
+            cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        db.commit()
+        focusflow.rebuild_user_stats()
+        db.autocommit = True
+        cursor.execute("ANALYZE")
+        db.autocommit = False
+        cursor.close()
+
+def exercise_api(focusflow, app):
+    """Call the endpoints the dashboard uses, as one seeded user"""
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'plan_user_1', 'password': PASSWORD})
+    if response.status_code != 302 or '/dashboard' not in response.headers.get('Location', ''):
+        raise RuntimeError("Could not log in as the seeded user")
+
+    today = date.today().isoformat()
+    past_day = (date.today() - timedelta(days=3)).isoformat()
+    session_id = 'session_1700000000000_planaaaaa'
+
+    def call(method, url, **kwargs):
+        response = client.open(url, method=method, **kwargs)
+        if response.status_code >= 500:
+            raise RuntimeError(f"{method} {url} failed with {response.status_code}")
+        return response.get_json(silent=True) or {}
+
+    task = call('POST', '/api/user-tasks', json={'entry_date': today, 'title': 'Plan check'})
+    task_id = task['id']
+    call('PUT', f'/api/user-tasks/{task_id}', json={'title': 'Plan check', 'status': 'pending', 'time_spent': 0})
+    call('PUT', f'/api/user-tasks/{task_id}/status', json={'status': 'pending', 'time_spent': 0})
+
+    call('POST', '/api/timer/start', json={'task_id': task_id, 'session_id': session_id})
+    call('POST', '/api/timer/sync', json={'task_id': task_id, 'session_id': session_id})
+    call('POST', '/api/timer/sync-batch', json={'timers': [{'task_id': task_id, 'session_id': session_id}]})
+    call('GET', f'/api/timer/status/{task_id}')
+    call('POST', '/api/timer/pause', json={'task_id': task_id, 'session_id': session_id})
+    call('POST', '/api/timer/start', json={'task_id': task_id, 'session_id': session_id})
+    call('POST', '/api/timer/cleanup', json={'task_id': task_id, 'session_id': session_id})
+    call('POST', '/api/timer/start', json={'task_id': task_id, 'session_id': session_id})
+    call('POST', '/api/timer/stop', json={'task_id': task_id, 'session_id': session_id})
+    for day in (today, past_day):
+        call('GET', f'/api/daily-summary?date={day}')
+        notes = call('GET', f'/api/user-notes?date={day}&limit=1')
+        if notes.get('next_cursor'):
+            call('GET', f"/api/user-notes?date={day}&limit=1&cursor={notes['next_cursor']}")
+        page = call('GET', f'/api/activity-log?date={day}&limit=2')
+        if page.get('next_cursor'):
+            call('GET', f"/api/activity-log?date={day}&limit=2&cursor={page['next_cursor']}")
+    feed = call('GET', '/api/activity-feed')
+    call('GET', f"/api/activity-feed?cursor={feed['next_cursor']}")
+
+    note = call('POST', '/api/user-notes', json={'entry_date': today, 'content': 'Plan check note'})
+    call('PUT', f"/api/user-notes/{note['id']}", json={'content': 'Edited', 'note_type': 'general'})
+    call('DELETE', f"/api/user-notes/{note['id']}")
+    call('POST', '/api/notes/save', json={'date': today, 'notes': 'Plan check'})
+    call('POST', '/api/activity/log', json={'message': 'Plan check', 'task_db_id': task_id})
+
+    call('GET', '/api/analytics')
+    call('GET', '/api/profile/stats')
+    call('GET', f'/api/heatmap?year={date.today().year}')
+    call('GET', f"/api/range-summary?from={(date.today() - timedelta(days=6)).isoformat()}&to={today}")
+    call('GET', '/health')
+    call('DELETE', f'/api/user-tasks/{task_id}')
+
+    # Streamed responses only run their queries while the body is read
+    call('GET', '/api/export')
+    call('GET', '/api/export/tasks?format=csv')
+    call('POST', '/api/user-tasks/import', content_type='multipart/form-data',
+         data={'file': (io.BytesIO(IMPORT_CSV.format(day=past_day).encode('utf-8')), 'tasks.csv')})
+
+def exercise_cli(focusflow, app):
+    """Run the per-user maintenance commands for one seeded user"""
+    with app.app_context():
+        user = focusflow.execute_query("SELECT id FROM users WHERE username = %s", ('plan_user_2',), fetch_one=True)
+    user_id = str(user['id'])
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        f.write(IMPORT_CSV.format(day=date.today().isoformat()))
+    runner = app.test_cli_runner()
+    try:
+        for args in (['import-tasks', f.name, '--user-id', user_id],
+                     ['rebuild-stats', '--user-id', user_id],
+                     ['check-stats', '--user-id', user_id],
+                     ['reap-timers']):
+            result = runner.invoke(args=args)
+            if result.exception and not isinstance(result.exception, SystemExit):
+                raise RuntimeError(f"flask {' '.join(args)} failed") from result.exception
+            if result.exit_code:
+                raise RuntimeError(f"flask {' '.join(args)} exited with {result.exit_code}: {result.output}")
+    finally:
+        os.remove(f.name)
+
+def large_tables(cursor, min_rows):
+    cursor.execute(
+        """SELECT relname FROM pg_class
+           WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace AND reltuples >= %s""",
+        (min_rows,)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+def seq_scans(plan, tables):
+    """Relations in tables that the plan reads with a sequential scan"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in tables:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child, tables))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--days', type=int, default=365, help='Days of history per user')
+    parser.add_argument('--tasks-per-day', type=int, default=3)
+    parser.add_argument('--min-rows', type=int, default=10000,
+                        help='Tables with at least this many rows must not be sequentially scanned')
+    args = parser.parse_args()
+
+    url = os.environ.get('QUERY_PLAN_DATABASE_URL')
+    if not url:
+        print("Set QUERY_PLAN_DATABASE_URL to a throwaway database; it will be wiped.")
+        sys.exit(2)
+    os.environ.update({
+        'DATABASE_URL': url,
+        'FLASK_ENV': 'development',
+        'WTF_CSRF_ENABLED': 'False',
+        'RATELIMIT_ENABLED': 'False',
+        'PASSWORD_HASH_WORKERS': '0',
+        'PASSWORD_HASH_ITERATIONS': '1000',
+    })
+    import app as focusflow
+    focusflow.DATABASE_CONFIG['connection_factory'] = RecordingConnection
+    app = focusflow.create_app()
+
+    print("🔍 FocusFlow Query Plan Regression Test")
+    print("=" * 40)
+    focusflow.init_db()
+    print(f"🌱 Seeding {args.users} users x {args.days} days x {args.tasks_per_day} tasks...")
+    seed(focusflow, app, args)
+
+    global recorded
+    recorded = []
+    try:
+        exercise_api(focusflow, app)
+        exercise_cli(focusflow, app)
+    finally:
+        statements, recorded = recorded, None
+
+    failures = 0
+    explained = set()
+    with app.app_context():
+        cursor = focusflow.get_db().cursor()
+        tables = large_tables(cursor, args.min_rows)
+        print(f"📊 Large tables: {', '.join(sorted(tables))}\n")
+        for query, params in statements:
+            statement = cursor.mogrify(query, params).decode('utf-8')
+            key = ' '.join(query.split())
+            if key in explained:
+                continue
+            explained.add(key)
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}")
+            plan = cursor.fetchone()[0]
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+            scanned = seq_scans(plan, tables)
+            summary = key[:100] + ('...' if len(key) > 100 else '')
+            if scanned:
+                failures += 1
+                print(f"❌ Seq Scan on {', '.join(sorted(set(scanned)))}: {summary}")
+            else:
+                print(f"✅ {summary}")
+        focusflow.get_db().rollback()
+        cursor.close()
+
+    print("\n" + "=" * 40)
+    print(f"📊 {len(explained)} distinct queries explained, {failures} with sequential scans")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()